@@ -0,0 +1,112 @@
+import json
+import os
+import re
+from functools import lru_cache
+
+from migrations import ID_COLUMNS, ROLLUP_TABLES, SUMMARY_TABLES
+
+# What each role may read: table -> {column: allowed values}. An empty
+# filter allows every row; a table left out is hidden from the role; None
+# allows everything. Slices are expressed on columns the table's summary
+# and rollup tables also carry, e.g. {'it_tickets': {'assigned_to': ['Bob Smith']}}
+# for one person's tickets or {'datasets_metadata': {'source': ['Finance']}}
+# for one department's datasets. ROLE_SCOPES_FILE points at a JSON file of
+# the same shape that replaces these defaults.
+DEFAULT_ROLE_SCOPES = {
+    'Admin': None,
+    'Cybersecurity': {'cyber_incidents': {}},
+    'Data Science': {'datasets_metadata': {}},
+    'IT Operations': {'it_tickets': {}},
+}
+
+
+def _load_scopes():
+    path = os.getenv('ROLE_SCOPES_FILE')
+    if not path:
+        return DEFAULT_ROLE_SCOPES
+    with open(path) as f:
+        return json.load(f)
+
+
+ROLE_SCOPES = _load_scopes()
+
+
+def _scoped_tables(table):
+    """A source table and the trigger-maintained tables holding its rows in summarized form"""
+    derived = [derived[table][0] for derived in (SUMMARY_TABLES, ROLLUP_TABLES) if table in derived]
+    return [table] + derived
+
+
+def _literal(value):
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _has_column(name, column):
+    for summary, keys, _, _ in SUMMARY_TABLES.values():
+        if summary == name:
+            return column in keys
+    for rollup, _, dims, _ in ROLLUP_TABLES.values():
+        if rollup == name:
+            return column in dims
+    return False
+
+
+def can_read(role, table):
+    """Whether a role may see any part of a table (a hidden table reads as empty)"""
+    scope = ROLE_SCOPES.get(role, {})
+    return scope is None or table in scope
+
+
+@lru_cache(maxsize=None)
+def role_views(role):
+    """Table name -> SQL of the rows of it a role may read, built once per role
+
+    Returns None when the role is unrestricted. Roles missing from
+    ROLE_SCOPES see nothing. A filter on a column some derived table lacks
+    is rejected, since that table could not be sliced the same way.
+    """
+    scope = ROLE_SCOPES.get(role, {})
+    if scope is None:
+        return None
+    views = {}
+    for table in ID_COLUMNS:
+        filters = scope.get(table)
+        for name in _scoped_tables(table):
+            if filters is None:
+                condition = "0"
+            else:
+                conditions = []
+                for column, values in filters.items():
+                    if name != table and not _has_column(name, column):
+                        raise ValueError(f"Cannot scope {table} by {column!r} for role {role!r}: "
+                                         f"{name} has no such column")
+                    conditions.append(f"{column} IN ({', '.join(_literal(v) for v in values) or 'NULL'})")
+                condition = " AND ".join(conditions) or "1"
+            views[name] = f"{name} AS (SELECT * FROM main.{name} WHERE {condition})"
+    return views
+
+
+def scope_query(query, role):
+    """query with the tables it reads replaced by the role's slice of them
+
+    Each table is shadowed by a common table expression of the same name,
+    so the statement itself is unchanged and the filter runs inside SQLite
+    (which flattens the CTE into the query, keeping its index use). A
+    schema-qualified name such as main.it_tickets would skip the CTE, so
+    one naming a scoped table raises ValueError.
+    """
+    views = role_views(role)
+    if views is None:
+        return query
+    for name in views:
+        if re.search(rf"\.\s*[\"`\[]?{name}\b", query):
+            raise ValueError(f"Scoped query reads {name} through a schema-qualified name")
+    used = [view for name, view in views.items() if re.search(rf"\b{name}\b", query)]
+    if not used:
+        return query
+    stripped = query.lstrip()
+    if stripped[:4].upper() == 'WITH':
+        return f"WITH {', '.join(used)}, {stripped[4:]}"
+    return f"WITH {', '.join(used)} {query}"
@@ -0,0 +1,264 @@
+import os
+import re
+import threading
+import time
+
+from ai_scheduler import PRIORITY_HIGH, PRIORITY_NORMAL, RateLimited, SchedulerBusy, scheduler
+from result_cache import ResultCache
+
+# Backend answering advisor questions: 'openai' (needs OPENAI_API_KEY) or
+# 'stub', a local canned responder for working offline
+AI_BACKEND = os.getenv('AI_BACKEND', 'openai')
+AI_MODEL = os.getenv('AI_MODEL', 'gpt-3.5-turbo')
+# Seconds an answer may take from the click to its last word
+AI_TIMEOUT = float(os.getenv('AI_TIMEOUT', '30'))
+AI_CACHE_MAX_BYTES = int(float(os.getenv('AI_CACHE_MAX_MB', '16')) * 1024 * 1024)
+AI_CACHE_TTL = float(os.getenv('AI_CACHE_TTL', '3600'))
+
+SYSTEM_PROMPTS = {
+    'cybersecurity': "You are a cybersecurity expert advisor providing actionable insights.",
+    'it_operations': "You are an IT operations expert.",
+    'data_science': "You are a data governance expert providing strategic insights.",
+}
+
+# Complete answers by (domain, normalized question, metrics context); failed
+# or timed-out requests are never stored
+response_cache = ResultCache(max_bytes=AI_CACHE_MAX_BYTES, ttl=AI_CACHE_TTL)
+
+_backend = None
+
+
+# ==================== BACKENDS ====================
+
+class OpenAIBackend:
+    """Streams chat completions from the OpenAI API"""
+
+    def __init__(self, api_key, model=AI_MODEL):
+        self.api_key = api_key
+        self.model = model
+
+    def stream(self, messages, timeout):
+        import openai
+        openai.api_key = self.api_key
+        try:
+            response = openai.ChatCompletion.create(
+                model=self.model,
+                messages=messages,
+                stream=True,
+                request_timeout=timeout
+            )
+        except openai.error.RateLimitError as e:
+            retry_after = (e.headers or {}).get('retry-after')
+            raise RateLimited(float(retry_after) if retry_after else 1.0)
+        for chunk in response:
+            content = chunk.choices[0].delta.get('content')
+            if content:
+                yield content
+
+
+class StubBackend:
+    """Offline backend that streams a canned answer word by word
+
+    The answer echoes the question, so cached and fresh replies can be told
+    apart in tests; delay is the pause before each word, to mimic a slow
+    model. calls counts the requests that reached the backend.
+    """
+
+    def __init__(self, reply=None, delay=0.02):
+        self.reply = reply
+        self.delay = delay
+        self.calls = 0
+
+    def stream(self, messages, timeout):
+        self.calls += 1
+        question = messages[-1]['content'].rsplit("Question:", 1)[-1].strip()
+        reply = self.reply or f"Stub advice for: {question}"
+        for word in reply.split(' '):
+            time.sleep(self.delay)
+            yield word + ' '
+
+
+class FakeProvider(StubBackend):
+    """StubBackend that enforces a provider-side rate limit, for load tests
+
+    At most limit requests are accepted in any window seconds; the rest
+    raise RateLimited as a real provider answers 429. latency is added
+    before the first word. accepted and rejected count the outcomes.
+    """
+
+    def __init__(self, limit=60, window=60.0, latency=0.5, reply=None, delay=0.0):
+        super().__init__(reply, delay)
+        self.limit = limit
+        self.window = window
+        self.latency = latency
+        self.accepted = 0
+        self.rejected = 0
+        self._starts = []
+        self._lock = threading.Lock()
+
+    def stream(self, messages, timeout):
+        with self._lock:
+            now = time.monotonic()
+            self._starts = [t for t in self._starts if t > now - self.window]
+            if len(self._starts) >= self.limit:
+                self.rejected += 1
+                raise RateLimited(self._starts[0] + self.window - now)
+            self._starts.append(now)
+            self.accepted += 1
+        time.sleep(self.latency)
+        yield from super().stream(messages, timeout)
+
+
+def get_backend():
+    """Configured backend, or None when the OpenAI API key is missing"""
+    global _backend
+    if _backend is None:
+        if AI_BACKEND == 'stub':
+            _backend = StubBackend()
+        elif os.getenv('OPENAI_API_KEY'):
+            _backend = OpenAIBackend(os.getenv('OPENAI_API_KEY'))
+    return _backend
+
+
+def set_backend(backend):
+    """Replace the process-wide backend, e.g. with a StubBackend for load tests"""
+    global _backend
+    _backend = backend
+
+
+# ==================== REQUESTS ====================
+
+def normalize_question(question):
+    """Lowercased question with whitespace collapsed and trailing punctuation dropped"""
+    return re.sub(r'\s+', ' ', question).strip().rstrip('?!. ').lower()
+
+
+def normalize_context(context):
+    """Metrics context with indentation and blank lines removed"""
+    return "\n".join(line.strip() for line in context.strip().splitlines() if line.strip())
+
+
+class Advice:
+    """Handle on one advisor answer, filled in by a worker thread as it streams
+
+    Pages keep the handle in session state and render text on every run,
+    so an interaction that interrupts the page does not lose the answer.
+    """
+
+    def __init__(self, key=None, timeout=AI_TIMEOUT):
+        self.key = key
+        self.deadline = time.monotonic() + timeout
+        self.error = None
+        self.cached = False
+        self._chunks = []
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    @property
+    def text(self):
+        with self._lock:
+            return ''.join(self._chunks)
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def _append(self, chunk):
+        with self._lock:
+            self._chunks.append(chunk)
+
+    def _finish(self, error=None):
+        with self._lock:
+            if self._done.is_set():
+                return
+            self.error = error
+        self._done.set()
+
+    def wait(self, timeout=None):
+        """Block until the answer is complete; returns whether it is"""
+        return self._done.wait(timeout)
+
+    def stream(self, poll=0.1):
+        """Yield the answer so far each time it grows, until it completes or times out
+
+        While nothing has arrived yet it yields the empty text every poll
+        seconds, so callers can show the request's place in the queue.
+        """
+        seen = None
+        while True:
+            finished = self._done.wait(poll)
+            if not finished and time.monotonic() > self.deadline:
+                self._finish(TimeoutError("AI advisor did not answer in time"))
+                finished = True
+            text = self.text
+            if text != seen or not text:
+                seen = text
+                yield text
+            if finished:
+                return
+
+
+def build_messages(domain, question, context):
+    return [
+        {"role": "system", "content": SYSTEM_PROMPTS[domain]},
+        {"role": "user", "content": f"{context}\n\nQuestion: {question}"}
+    ]
+
+
+def _run(advice, backend, key, messages):
+    try:
+        remaining = advice.deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("AI advisor did not answer in time")
+        for chunk in backend.stream(messages, remaining):
+            if advice.done:
+                # Timed out on the page side; stop reading the stream
+                return
+            advice._append(chunk)
+            if time.monotonic() > advice.deadline:
+                raise TimeoutError("AI advisor did not answer in time")
+        response_cache.put(key, advice.text)
+        advice._finish()
+    except RateLimited:
+        if advice.text:
+            advice._finish(RuntimeError("AI service rate limit hit mid-answer"))
+            return
+        # Nothing shown yet; the scheduler queues it again once the limit clears
+        raise
+    except Exception as e:
+        advice._finish(e)
+
+
+def ask(domain, question, context, backend=None, timeout=AI_TIMEOUT, priority=PRIORITY_NORMAL):
+    """Start answering a question about a domain's metrics; returns an Advice at once
+
+    Answers already given for the same domain, question (ignoring case,
+    spacing and trailing punctuation) and context come from the cache
+    complete. Otherwise the request is queued on the shared scheduler, which
+    hands back the Advice of an identical request already in flight, and
+    the answer streams into the Advice, failing with TimeoutError after
+    timeout seconds. Raises SchedulerBusy when the queue is full.
+    """
+    backend = backend or get_backend()
+    if backend is None:
+        raise RuntimeError("AI backend not configured")
+    context = normalize_context(context)
+    key = (domain, normalize_question(question), context)
+    advice = Advice(key, timeout)
+
+    hit, text = response_cache.get(key)
+    if hit:
+        advice.cached = True
+        advice._append(text)
+        advice._finish()
+        return advice
+
+    messages = build_messages(domain, question.strip(), context)
+    return scheduler.submit(key, advice, lambda advice: _run(advice, backend, key, messages), priority)
+
+
+def queue_status(advice):
+    """(requests ahead, estimated seconds) while an Advice waits for the scheduler, else None"""
+    if advice.key is None or advice.done:
+        return None
+    return scheduler.position(advice.key)
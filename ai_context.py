@@ -0,0 +1,170 @@
+import os
+
+from result_cache import ResultCache
+
+# Prompt budget for the metrics context, in tokens, and how many entries
+# each ranked section lists at most
+AI_CONTEXT_TOKENS = int(os.getenv('AI_CONTEXT_TOKENS', '300'))
+AI_CONTEXT_TOP_N = int(os.getenv('AI_CONTEXT_TOP_N', '3'))
+# Assignees resolving this many times slower than the team are called out
+OUTLIER_RATIO = 1.25
+# Monthly trend points given to the model, latest last
+TREND_MONTHS = 4
+
+# Rendered contexts by (database, role, domain, table version, budget, top_n)
+context_cache = ResultCache(max_bytes=1024 * 1024)
+
+DOMAIN_TABLES = {
+    'cybersecurity': 'cyber_incidents',
+    'it_operations': 'it_tickets',
+    'data_science': 'datasets_metadata',
+}
+
+
+def estimate_tokens(text):
+    """Rough token count of English text, about four characters per token"""
+    return (len(text) + 3) // 4
+
+
+def fit_budget(sections, budget):
+    """Join (title, lines) sections into context text of at most budget tokens
+
+    Sections come most important first and their lines likewise, so once a
+    line does not fit, it and everything after it is dropped. The first
+    section is always kept whole.
+    """
+    out = []
+    used = 0
+    for i, (title, lines) in enumerate(sections):
+        if not lines:
+            continue
+        block = [f"{title}:"]
+        for line in lines:
+            candidate = f"- {line}"
+            cost = estimate_tokens(candidate) + 1
+            if i and used + estimate_tokens(block[0]) + cost > budget:
+                break
+            block.append(candidate)
+            used += cost
+        if len(block) == 1:
+            break
+        used += estimate_tokens(block[0]) + 1
+        out.extend(block)
+    return "\n".join(out)
+
+
+def _trend_line(trend, unit):
+    """Last TREND_MONTHS monthly counts and the change of the latest full month"""
+    counts = trend['count'].astype(int).tolist()[-TREND_MONTHS:]
+    months = [str(d)[:7] for d in trend['date'].tolist()[-TREND_MONTHS:]]
+    line = f"Monthly {unit} {months[0]} to {months[-1]} (latest may be partial): {', '.join(map(str, counts))}"
+    if len(counts) >= 3 and counts[-3]:
+        change = (counts[-2] - counts[-3]) / counts[-3] * 100
+        line += f"; last full month {change:+.0f}%"
+    return line
+
+
+# ==================== DOMAIN SUMMARIES ====================
+# All read the KPI summary and rollup tables (or an index-ordered LIMIT),
+# never a full scan of the source table.
+
+def cybersecurity_sections(db, top_n):
+    kpis = db.get_incident_kpis()
+    avg = kpis['avg_resolution_days']
+    sections = [("Cybersecurity metrics", [
+        f"Total incidents: {kpis['total_incidents']}",
+        f"Unresolved: {kpis['unresolved']}",
+        f"High severity: {kpis['high_severity']} ({db.count_critical_incidents()} still unresolved)",
+        f"Avg resolution: {avg:.1f} days" if avg is not None else "Avg resolution: n/a",
+    ])]
+
+    resolution = db.get_resolution_time_by_incident_type().dropna(subset=['avg_resolution_days'])
+    sections.append(("Slowest incident types to resolve", [
+        f"{row.incident_type}: {row.avg_resolution_days:.1f} days avg over {row.resolved_count} resolved"
+        for row in resolution.head(top_n).itertuples()
+    ]))
+
+    types = db.get_incident_type_counts()
+    total = kpis['total_incidents'] or 1
+    sections.append(("Most frequent incident types", [
+        f"{row.incident_type}: {row.count} ({row.count / total:.0%})"
+        for row in types.head(top_n).itertuples()
+    ]))
+
+    trend = db.get_incident_trend(granularity='month')
+    sections.append(("Trend", [_trend_line(trend, "incidents")] if len(trend) else []))
+    return sections
+
+
+def it_operations_sections(db, top_n):
+    kpis = db.get_ticket_kpis()
+    avg = kpis['avg_resolution_days']
+    sections = [("IT operations metrics", [
+        f"Total tickets: {kpis['total_tickets']}",
+        f"Open or in progress: {kpis['open_tickets']}",
+        f"High priority: {kpis['high_priority']}",
+        f"Avg resolution: {avg:.1f} days" if avg is not None else "Avg resolution: n/a",
+    ])]
+
+    staff = db.get_staff_performance().dropna(subset=['avg_resolution_days'])
+    if avg:
+        outliers = staff[staff['avg_resolution_days'] >= avg * OUTLIER_RATIO]
+        sections.append(("Slowest assignees (vs team average)", [
+            f"{row.assigned_to}: {row.avg_resolution_days:.1f} days avg "
+            f"({row.avg_resolution_days / avg:.1f}x), {row.ticket_count} tickets"
+            for row in outliers.head(top_n).itertuples()
+        ]))
+
+    backlog = db.get_status_impact()
+    backlog = backlog[backlog['status'] != 'Resolved'].sort_values('ticket_count', ascending=False)
+    sections.append(("Unresolved tickets by status", [
+        f"{row.status}: {row.ticket_count}" for row in backlog.head(top_n).itertuples()
+    ]))
+
+    trend = db.get_ticket_trend(granularity='month')
+    sections.append(("Trend", [_trend_line(trend, "tickets")] if len(trend) else []))
+    return sections
+
+
+def data_science_sections(db, top_n):
+    kpis = db.get_dataset_kpis()
+    total = kpis['total_storage_mb'] or 1
+    sections = [("Data science metrics", [
+        f"Total datasets: {kpis['total_datasets']}",
+        f"Total storage: {kpis['total_storage_mb']:.1f} MB",
+        f"Total records: {kpis['total_rows']:,}",
+        f"Avg dataset size: {kpis['avg_size_mb'] or 0:.1f} MB",
+    ])]
+
+    sources = db.get_source_stats()
+    sections.append(("Storage by source", [
+        f"{row.source}: {row.total_size_mb:.0f} MB ({row.total_size_mb / total:.0%}), {row.dataset_count} datasets"
+        for row in sources.head(top_n).itertuples()
+    ]))
+
+    largest = db.get_top_datasets(top_n)
+    sections.append(("Largest datasets", [
+        f"{row.dataset_name} ({row.source}): {row.size_mb:.0f} MB" for row in largest.itertuples()
+    ]))
+    return sections
+
+
+SECTION_BUILDERS = {
+    'cybersecurity': cybersecurity_sections,
+    'it_operations': it_operations_sections,
+    'data_science': data_science_sections,
+}
+
+
+def build_context(db, domain, budget=AI_CONTEXT_TOKENS, top_n=AI_CONTEXT_TOP_N):
+    """Compact metrics summary of a domain for the advisor prompt
+
+    Headline KPIs, top-N bottlenecks and outliers and the recent trend,
+    read from the precomputed aggregates and cut to budget tokens. Cached
+    per table version and role, so every advisor call between two writes
+    reuses the same text, which also keeps the advisor's response cache
+    key stable.
+    """
+    key = (os.path.abspath(db.db_path), db.role, domain,
+           db.get_data_version(DOMAIN_TABLES[domain]), budget, top_n)
+    return context_cache.get_or_compute(key, lambda: fit_budget(SECTION_BUILDERS[domain](db, top_n), budget))
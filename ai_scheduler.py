@@ -0,0 +1,207 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Requests started per minute across every session in the process, and how
+# many may start back to back after a quiet spell
+AI_RATE_PER_MIN = float(os.getenv('AI_RATE_PER_MIN', '60'))
+AI_BURST = int(os.getenv('AI_BURST', '10'))
+# Requests in flight to the provider at once
+AI_WORKERS = int(os.getenv('AI_WORKERS', '4'))
+# Requests allowed to wait; beyond this new ones are turned away at once
+AI_MAX_PENDING = int(os.getenv('AI_MAX_PENDING', '32'))
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+
+
+class RateLimited(Exception):
+    """Raised by a backend when the provider rejects a request for exceeding its rate limit"""
+
+    def __init__(self, retry_after=1.0):
+        super().__init__(f"Rate limited, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class SchedulerBusy(RuntimeError):
+    """Raised when the request queue is full; carries a wait estimate in seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"AI advisor is busy, try again in about {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Thread-safe token bucket: rate tokens per second, holding at most burst"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        """Take a token if one is available; otherwise return the seconds until one is"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def pause(self, seconds):
+        """Hand out nothing for seconds and start empty afterwards, e.g. after a provider 429"""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+
+class RequestScheduler:
+    """Shared queue that paces every session's AI requests under one rate limit
+
+    Jobs are keyed: submitting a key that is already queued or running
+    returns the handle of that request instead of a new one, so a burst of
+    identical questions costs one call. High-priority jobs are started
+    first and may use the last quarter of the queue, which normal jobs are
+    refused. Jobs raising RateLimited are put back in the queue and the
+    bucket is paused for the provider's retry-after.
+    """
+
+    def __init__(self, rate_per_min=AI_RATE_PER_MIN, burst=AI_BURST, workers=AI_WORKERS,
+                 max_pending=AI_MAX_PENDING):
+        self.bucket = TokenBucket(rate_per_min / 60.0, burst)
+        self.workers = workers
+        self.max_pending = max_pending
+        self._reserved = max(1, max_pending // 4)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ai-request')
+        self._queue = []                # heap of (priority, seq, key)
+        self._jobs = {}                 # key -> (handle, run, priority, seq)
+        self._running = set()           # keys of jobs started on the pool
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self.coalesced = 0
+        self.rejected = 0
+        self.retried = 0
+        self._thread = threading.Thread(target=self._dispatch, name='ai-scheduler', daemon=True)
+        self._thread.start()
+
+    def submit(self, key, handle, run, priority=PRIORITY_NORMAL):
+        """Queue run(handle) under key; returns the handle of the request that will answer it
+
+        Raises SchedulerBusy when the queue is full for this priority.
+        """
+        with self._cond:
+            job = self._jobs.get(key)
+            if job is not None:
+                self.coalesced += 1
+                if priority < job[2] and key not in self._running:
+                    self._enqueue(key, job[0], job[1], priority)
+                return job[0]
+            limit = self.max_pending if priority == PRIORITY_HIGH else self.max_pending - self._reserved
+            queued = len(self._jobs) - len(self._running)
+            if queued >= limit:
+                self.rejected += 1
+                raise SchedulerBusy(self._eta(queued))
+            self._enqueue(key, handle, run, priority)
+            return handle
+
+    def _enqueue(self, key, handle, run, priority):
+        seq = next(self._seq)
+        self._jobs[key] = (handle, run, priority, seq)
+        heapq.heappush(self._queue, (priority, seq, key))
+        self._cond.notify()
+
+    def _live(self, entry):
+        priority, seq, key = entry
+        job = self._jobs.get(key)
+        return job is not None and job[3] == seq and key not in self._running
+
+    def _has_work(self):
+        """Drop finished and superseded entries off the top of the heap; True if a job is left"""
+        while self._queue:
+            key = self._queue[0][2]
+            job = self._jobs.get(key)
+            if self._live(self._queue[0]):
+                if not getattr(job[0], 'done', False):
+                    return True
+                # Abandoned while queued (e.g. timed out); it costs no token
+                del self._jobs[key]
+            heapq.heappop(self._queue)
+        return False
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while len(self._running) >= self.workers or not self._has_work():
+                    self._cond.wait()
+            wait = self.bucket.try_acquire()
+            if wait:
+                time.sleep(wait)
+                continue
+            with self._cond:
+                if not self._has_work():
+                    continue
+                key = heapq.heappop(self._queue)[2]
+                job = self._jobs[key]
+                self._running.add(key)
+            self._executor.submit(self._run, key, job)
+
+    def _run(self, key, job):
+        handle, run, priority, seq = job
+        try:
+            run(handle)
+        except RateLimited as e:
+            self.bucket.pause(e.retry_after)
+            with self._cond:
+                self.retried += 1
+                self._running.discard(key)
+                self._enqueue(key, handle, run, priority)
+            return
+        except Exception:
+            # run reports its own failures through the handle
+            pass
+        with self._cond:
+            self._running.discard(key)
+            self._jobs.pop(key, None)
+            self._cond.notify()
+
+    def _eta(self, ahead):
+        return (ahead + 1) / self.bucket.rate
+
+    def position(self, key):
+        """(requests ahead, estimated seconds to start) for a queued key; None once it is running or gone"""
+        with self._cond:
+            job = self._jobs.get(key)
+            if job is None or key in self._running:
+                return None
+            ahead = sum(1 for entry in self._queue if entry < (job[2], job[3]) and self._live(entry))
+            return ahead, self._eta(ahead)
+
+    def stats(self):
+        """Queue depth, running count and coalesced/rejected/retried counters"""
+        with self._cond:
+            return {
+                'queued': len(self._jobs) - len(self._running),
+                'running': len(self._running),
+                'coalesced': self.coalesced,
+                'rejected': self.rejected,
+                'retried': self.retried,
+            }
+
+
+# Shared by every session in the process
+scheduler = RequestScheduler()
@@ -0,0 +1,10 @@
+"""Dashboard analyses: shaping, ranking and running aggregation of result frames
+
+Aggregation itself stays in SQL (DatabaseManager) or in the running group
+stats; views turns DatabaseManager results into the labelled frames the
+pages display, and the other modules shape and rank frames for the pages
+and charts. Nothing here touches Streamlit.
+"""
+from analytics.aggregates import RunningGroupStats, add_resolution_days
+from analytics.common import extremes, from_group_stats, largest_share, rank_desc
+from analytics.downsample import downsample, lttb
@@ -0,0 +1,85 @@
+import pandas as pd
+
+
+def add_resolution_days(df, start_col, end_col='resolved_date'):
+    """Add resolution_time_days (whole days from start_col to end_col) to a frame"""
+    start = pd.to_datetime(df[start_col], format='mixed')
+    end = pd.to_datetime(df[end_col], format='mixed')
+    df['resolution_time_days'] = (end - start).dt.days
+    return df
+
+
+class RunningGroupStats:
+    """Per-group row count and mean of a value, updated by adding and removing rows
+
+    Keeps only sums and counts per group, so folding a change into the
+    statistics costs time proportional to the changed rows.
+    """
+
+    def __init__(self, key, value):
+        self.key = key
+        self.value = value
+        self.totals = pd.DataFrame(columns=['rows', 'value_sum', 'value_count'], dtype='float64')
+
+    def _partial(self, df):
+        """Sums and counts per group for a batch of rows"""
+        grouped = df.groupby(self.key, observed=True)[self.value]
+        return pd.DataFrame({
+            'rows': grouped.size(),
+            'value_sum': grouped.sum(),
+            'value_count': grouped.count(),
+        }).astype('float64')
+
+    def add(self, df):
+        """Fold new rows into the statistics"""
+        if len(df):
+            self.totals = self.totals.add(self._partial(df), fill_value=0)
+
+    def remove(self, df):
+        """Take previously added rows back out of the statistics"""
+        if len(df):
+            self.totals = self.totals.sub(self._partial(df), fill_value=0)
+            self.totals = self.totals[self.totals['rows'] > 0]
+
+    def result(self):
+        """Frame of key, mean and sum of value, rows per group and non-null value count"""
+        totals = self.totals
+        mean = totals['value_sum'] / totals['value_count'].where(totals['value_count'] > 0)
+        return pd.DataFrame({
+            self.key: totals.index,
+            'mean': mean.values,
+            'sum': totals['value_sum'].values,
+            'rows': totals['rows'].astype('int64').values,
+            'value_count': totals['value_count'].astype('int64').values,
+        })
+
+
+# Chunk consumers: statistics over DatabaseManager.iter_* in memory bounded by
+# the number of groups, whatever the number of rows.
+
+def group_stats_from_chunks(chunks, key, value, derive=None):
+    """Per-group mean/sum/count of value over a stream of chunks"""
+    stats = RunningGroupStats(key, value)
+    for chunk in chunks:
+        stats.add(derive(chunk) if derive else chunk)
+    return stats.result()
+
+
+def counts_by_day_from_chunks(chunks, date_col):
+    """Number of rows per calendar day over a stream of chunks"""
+    counts = pd.Series(dtype='int64')
+    for chunk in chunks:
+        days = chunk[date_col].dt.normalize().value_counts()
+        counts = counts.add(days, fill_value=0)
+    counts = counts.sort_index().astype('int64')
+    return pd.DataFrame({'date': counts.index.date, 'count': counts.values})
+
+
+def totals_from_chunks(chunks, columns):
+    """Row count and column sums over a stream of chunks"""
+    totals = {'rows': 0, **{col: 0 for col in columns}}
+    for chunk in chunks:
+        totals['rows'] += len(chunk)
+        for col in columns:
+            totals[col] += chunk[col].sum()
+    return totals
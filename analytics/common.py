@@ -0,0 +1,28 @@
+def rank_desc(frame, value_col):
+    """Rows sorted by value_col, largest first, rows without a value last"""
+    return frame.sort_values(value_col, ascending=False, na_position='last', ignore_index=True)
+
+
+def extremes(frame, value_col):
+    """(largest, smallest) rows by value_col, ignoring rows without a value; (None, None) if none have one"""
+    valued = frame.dropna(subset=[value_col])
+    if valued.empty:
+        return None, None
+    return valued.loc[valued[value_col].idxmax()], valued.loc[valued[value_col].idxmin()]
+
+
+def largest_share(frame, label_col, value_col):
+    """(label, value, percentage of the column total) of the row with the largest value"""
+    total = frame[value_col].sum()
+    largest = frame.loc[frame[value_col].idxmax()]
+    share = largest[value_col] / total * 100 if total else 0.0
+    return largest[label_col], largest[value_col], share
+
+
+def from_group_stats(stats, key, labels):
+    """Display frame from RunningGroupStats.result(): renamed by labels, slowest first
+
+    labels maps key, 'mean' and 'rows' to their display names.
+    """
+    view = stats.rename(columns=labels)[[labels[key], labels['mean'], labels['rows']]]
+    return rank_desc(view, labels['mean'])
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+
+def lttb(x, y, max_points):
+    """Positions of at most max_points points that keep the visual shape of a series
+
+    Largest-Triangle-Three-Buckets: the first and last points are kept, the
+    rest are split into max_points - 2 buckets, and from each bucket the
+    point forming the largest triangle with the previously kept point and
+    the average of the next bucket is kept. x must be numeric and sorted.
+    """
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    kept = np.empty(max_points, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_x = x[end:edges[bucket + 2]].mean()
+            next_y = y[end:edges[bucket + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        # Twice the triangle area; the constant factor does not change the argmax
+        area = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        kept[bucket + 1] = previous
+    return kept
+
+
+def _numeric(values):
+    """Values as float64, date-like values as nanoseconds since the epoch"""
+    if np.issubdtype(values.dtype, np.number):
+        return values.to_numpy(dtype='float64')
+    return pd.to_datetime(values).to_numpy().astype('datetime64[ns]').astype(np.int64).astype('float64')
+
+
+def downsample(frame, x, y, max_points, by=None):
+    """Rows of frame reduced to at most max_points per series with LTTB
+
+    x is a numeric or date-like column the frame is sorted by; by splits
+    the frame into separately downsampled series. Frames already within
+    budget are returned unchanged.
+    """
+    if by is None:
+        groups = [frame]
+    else:
+        groups = [group for _, group in frame.groupby(by, sort=False, observed=True)]
+    if all(len(group) <= max_points for group in groups):
+        return frame
+
+    parts = []
+    for group in groups:
+        positions = _numeric(group[x])
+        parts.append(group.iloc[lttb(positions, group[y].to_numpy(), max_points)])
+    return parts[0] if len(parts) == 1 else pd.concat(parts).sort_index()
+
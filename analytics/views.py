@@ -0,0 +1,65 @@
+# Data preparation behind each dashboard view, separated from the Streamlit
+# rendering so it can be called, timed and checked without running a page.
+# Each function returns the frame the view displays, with display labels.
+
+
+# Cybersecurity
+
+def incident_resolution_view(db):
+    """Average resolution time per incident type, slowest first"""
+    return db.get_resolution_time_by_incident_type().rename(columns={
+        'incident_type': 'Incident Type',
+        'avg_resolution_days': 'Avg Days to Resolve',
+        'resolved_count': 'Count'
+    })
+
+
+def incident_trend_view(db, start, end, granularity):
+    """Incident counts per day, week or month"""
+    return db.get_incident_trend(start, end, granularity).rename(columns={'date': 'Date', 'count': 'Count'})
+
+
+def incident_type_view(db):
+    """Number of incidents per type"""
+    return db.get_incident_type_counts().rename(columns={'incident_type': 'Incident Type', 'count': 'Count'})
+
+
+# IT Operations
+
+def staff_performance_view(db):
+    """Average resolution time and ticket count per staff member, slowest first"""
+    return db.get_staff_performance().rename(columns={
+        'assigned_to': 'Staff Member',
+        'avg_resolution_days': 'Avg Resolution Days',
+        'ticket_count': 'Ticket Count'
+    })
+
+
+def status_impact_view(db):
+    """Average resolution time and ticket count per status, slowest first"""
+    return db.get_status_impact().rename(columns={
+        'status': 'Status',
+        'avg_resolution_days': 'Avg Resolution Days',
+        'ticket_count': 'Count'
+    })
+
+
+def ticket_trend_view(db, start, end, granularity):
+    """Tickets created per day, week or month by priority"""
+    return db.get_ticket_trend(start, end, granularity, by='priority').rename(columns={
+        'date': 'Date',
+        'priority': 'Priority',
+        'count': 'Tickets'
+    })
+
+
+# Data Science
+
+def source_stats_view(db):
+    """Storage, rows and dataset count per source, largest first"""
+    return db.get_source_stats().rename(columns={
+        'source': 'Source',
+        'total_size_mb': 'Total Size (MB)',
+        'total_rows': 'Total Rows',
+        'dataset_count': 'Dataset Count'
+    })
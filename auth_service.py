@@ -0,0 +1,120 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from result_cache import ResultCache
+
+# bcrypt cost for new password hashes; existing hashes keep the cost they were made with
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+# Verifications run at most this many at a time, leaving the other cores to page reruns
+AUTH_WORKERS = int(os.getenv('AUTH_WORKERS', str(max(1, (os.cpu_count() or 2) // 2))))
+# Logins allowed to wait for a worker before new ones are turned away
+AUTH_MAX_PENDING = int(os.getenv('AUTH_MAX_PENDING', str(AUTH_WORKERS * 8)))
+AUTH_TIMEOUT = float(os.getenv('AUTH_TIMEOUT', '10'))
+SESSION_HOURS = float(os.getenv('AUTH_SESSION_HOURS', '8'))
+# Signs session tokens. Without a configured secret a random one is used, so
+# tokens do not outlive the process.
+SESSION_SECRET = os.getenv('AUTH_SECRET', '').encode('utf-8') or secrets.token_bytes(32)
+
+# Credential rows by (database, username, users table version); unknown
+# usernames are cached too, as None
+user_cache = ResultCache(max_bytes=4 * 1024 * 1024)
+
+_executor = ThreadPoolExecutor(max_workers=AUTH_WORKERS, thread_name_prefix='bcrypt')
+_pending = threading.BoundedSemaphore(AUTH_MAX_PENDING)
+_dummy_hash = None
+
+
+def hash_password(password, rounds=BCRYPT_ROUNDS):
+    """bcrypt hash of a password as text, for storing in users.password_hash"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+
+def get_user(db, username):
+    """(username, password_hash, role) for a username, or None; cached until the users table changes"""
+    key = (os.path.abspath(db.db_path), username, db.get_data_version('users'))
+    return user_cache.get_or_compute(key, lambda: db.get_user_credentials(username))
+
+
+def _check(password, stored_hash):
+    return bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8'))
+
+
+def verify_password(password, stored_hash, timeout=AUTH_TIMEOUT):
+    """Check a password against a bcrypt hash on the verification pool
+
+    Raises TimeoutError when AUTH_MAX_PENDING logins are already waiting or
+    the check does not finish within timeout, so a login burst queues a
+    bounded amount of work instead of stalling every rerun.
+    """
+    if not _pending.acquire(blocking=False):
+        raise TimeoutError("Too many logins in progress")
+    try:
+        future = _executor.submit(_check, password, stored_hash)
+    except BaseException:
+        _pending.release()
+        raise
+    # The slot is freed when the check ends or is cancelled, not when the caller
+    # gives up, so timed-out checks still count against AUTH_MAX_PENDING
+    future.add_done_callback(lambda _: _pending.release())
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        future.cancel()
+        raise
+
+
+def authenticate(db, username, password, timeout=AUTH_TIMEOUT):
+    """(username, role) if the password matches, None otherwise
+
+    Unknown usernames are checked against a dummy hash, so they take as
+    long as a wrong password and do not reveal which accounts exist.
+    """
+    global _dummy_hash
+    user = get_user(db, username)
+    if user is None:
+        if _dummy_hash is None:
+            _dummy_hash = hash_password(secrets.token_hex(8))
+        verify_password(password, _dummy_hash, timeout)
+        return None
+    stored_username, stored_hash, role = user
+    if not verify_password(password, stored_hash, timeout):
+        return None
+    return stored_username, role
+
+
+# Session tokens: base64url JSON payload and its HMAC-SHA256, joined by "."
+
+def _sign(payload):
+    return hmac.new(SESSION_SECRET, payload, hashlib.sha256).hexdigest()
+
+
+def issue_token(username, role, hours=SESSION_HOURS):
+    """Signed token carrying the user, role and expiry of a session"""
+    claims = {'user': username, 'role': role, 'exp': int(time.time() + hours * 3600)}
+    payload = base64.urlsafe_b64encode(json.dumps(claims, separators=(',', ':')).encode('utf-8'))
+    return f"{payload.decode('ascii')}.{_sign(payload)}"
+
+
+def verify_token(token):
+    """(username, role) of a valid, unexpired token, else None; no bcrypt, no database"""
+    if not token or '.' not in token:
+        return None
+    payload, signature = token.rsplit('.', 1)
+    try:
+        if not hmac.compare_digest(_sign(payload.encode('ascii')), signature):
+            return None
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+    except (TypeError, ValueError):
+        return None
+    if claims.get('exp', 0) < time.time():
+        return None
+    return claims['user'], claims['role']
@@ -0,0 +1,227 @@
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+import ai_context
+from analytics import add_resolution_days, views
+from charts import time_series_figure
+from database import DatabaseManager, choose_granularity
+from generate_data import generate_database
+from incremental import IncrementalFrame
+
+DEFAULT_SIZES = (1000, 100000)
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.20
+# Changes smaller than this are timer noise whatever their ratio
+DEFAULT_MIN_DELTA_MS = 0.5
+BENCH_DIR = os.getenv('BENCH_DATA_DIR', 'bench_data')
+# Fixed seed and end date so every run of a size benchmarks the same rows
+BENCH_SEED = 42
+BENCH_END = '2024-12-31'
+
+
+def _ticket_frame(db):
+    """Fully loaded incremental ticket frame with resolution days and per-assignee/status stats"""
+    tickets = IncrementalFrame(db, 'it_tickets', lambda df: add_resolution_days(df, 'created_date'),
+                               ('assigned_to', 'status'), 'resolution_time_days')
+    tickets.refresh()
+    return tickets
+
+
+def _prepare(db):
+    """Inputs shared by the cases: trend range and a loaded ticket frame"""
+    first_day, last_day = db.get_trend_date_range('cyber_incidents')
+    tickets = _ticket_frame(db)
+    return {
+        'start': first_day,
+        'end': last_day,
+        'granularity': choose_granularity(first_day, last_day),
+        'tickets': tickets,
+    }
+
+
+def _consume(chunks):
+    return sum(len(chunk) for chunk in chunks)
+
+
+# (name, function of (db, context)). Names are stable keys for baseline
+# comparison: rename a case only together with the stored baseline.
+CASES = [
+    # Cybersecurity
+    ('db.get_incident_kpis', lambda db, ctx: db.get_incident_kpis()),
+    ('db.get_resolution_time_by_incident_type', lambda db, ctx: db.get_resolution_time_by_incident_type()),
+    ('db.get_incident_trend', lambda db, ctx: db.get_incident_trend(ctx['start'], ctx['end'], ctx['granularity'])),
+    ('db.get_incident_trend[day]', lambda db, ctx: db.get_incident_trend(ctx['start'], ctx['end'], 'day')),
+    ('db.get_incident_type_counts', lambda db, ctx: db.get_incident_type_counts()),
+    ('db.count_critical_incidents', lambda db, ctx: db.count_critical_incidents()),
+    ('db.page_critical_incidents', lambda db, ctx: db.page_critical_incidents()),
+    ('db.get_critical_incidents', lambda db, ctx: db.get_critical_incidents()),
+    ('db.get_incidents_by_severity', lambda db, ctx: db.get_incidents_by_severity('High')),
+    ('db.get_unresolved_incidents', lambda db, ctx: db.get_unresolved_incidents()),
+    ('db.get_all_incidents', lambda db, ctx: db.get_all_incidents()),
+    ('db.iter_incidents', lambda db, ctx: _consume(db.iter_incidents())),
+    ('db.search_incidents', lambda db, ctx: db.search_incidents('phish')),
+    # IT Operations
+    ('db.get_ticket_kpis', lambda db, ctx: db.get_ticket_kpis()),
+    ('db.get_staff_performance', lambda db, ctx: db.get_staff_performance()),
+    ('db.get_status_impact', lambda db, ctx: db.get_status_impact()),
+    ('db.get_ticket_trend', lambda db, ctx: db.get_ticket_trend(ctx['start'], ctx['end'], ctx['granularity'], by='priority')),
+    ('db.get_tickets_by_assignee', lambda db, ctx: db.get_tickets_by_assignee('Bob Smith')),
+    ('db.get_all_tickets', lambda db, ctx: db.get_all_tickets()),
+    ('db.get_table_delta[unchanged]', lambda db, ctx: db.get_table_delta(
+        'it_tickets', ctx['tickets'].last_id, ctx['tickets'].last_change_id)),
+    ('db.search_tickets', lambda db, ctx: db.search_tickets('password reset')),
+    ('incremental.it_tickets[full load]', lambda db, ctx: _ticket_frame(db)),
+    ('incremental.it_tickets[refresh]', lambda db, ctx: ctx['tickets'].refresh()),
+    # Data Science
+    ('db.get_dataset_kpis', lambda db, ctx: db.get_dataset_kpis()),
+    ('db.get_source_stats', lambda db, ctx: db.get_source_stats()),
+    ('db.get_top_datasets', lambda db, ctx: db.get_top_datasets(10)),
+    ('db.page_datasets', lambda db, ctx: db.page_datasets()),
+    ('db.page_datasets[source]', lambda db, ctx: db.page_datasets('upload_date', sources=['Finance'])),
+    ('db.count_datasets[search]', lambda db, ctx: db.count_datasets(name_search='marketing')),
+    ('db.search_datasets', lambda db, ctx: db.search_datasets('marketing')),
+    ('db.get_all_datasets', lambda db, ctx: db.get_all_datasets()),
+    # Page data preparation
+    ('view.incident_resolution', lambda db, ctx: views.incident_resolution_view(db)),
+    ('view.incident_trend', lambda db, ctx: views.incident_trend_view(
+        db, ctx['start'], ctx['end'], ctx['granularity'])),
+    ('view.incident_type', lambda db, ctx: views.incident_type_view(db)),
+    ('view.staff_performance', lambda db, ctx: views.staff_performance_view(db)),
+    ('view.status_impact', lambda db, ctx: views.status_impact_view(db)),
+    ('view.ticket_trend', lambda db, ctx: views.ticket_trend_view(
+        db, ctx['start'], ctx['end'], ctx['granularity'])),
+    ('view.source_stats', lambda db, ctx: views.source_stats_view(db)),
+    ('chart.incident_trend[day]', lambda db, ctx: time_series_figure(
+        views.incident_trend_view(db, ctx['start'], ctx['end'], 'day'), 'Date', 'Count', 'Trend', markers=True)),
+    ('db.get_data_version', lambda db, ctx: db.get_data_version('it_tickets')),
+    ('ai_context.it_operations[build]', lambda db, ctx: ai_context.fit_budget(
+        ai_context.it_operations_sections(db, ai_context.AI_CONTEXT_TOP_N), ai_context.AI_CONTEXT_TOKENS)),
+]
+
+
+def bench_database(size):
+    """Path of the generated database for a size, creating it on first use
+
+    size is the number of incidents and of tickets; datasets are a tenth
+    of that.
+    """
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    path = os.path.join(BENCH_DIR, f"bench_{size}_{BENCH_SEED}.db")
+    if not os.path.exists(path):
+        print(f"Generating {path}...")
+        generate_database(path, size, size, max(20, size // 10), seed=BENCH_SEED, end=BENCH_END)
+    return path
+
+
+def time_case(func, db, ctx, repeat):
+    """Run one case once to warm up, then repeat times; timings in milliseconds"""
+    func(db, ctx)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(db, ctx)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'median_ms': statistics.median(timings),
+        'min_ms': min(timings),
+        'max_ms': max(timings),
+        'runs': repeat,
+    }
+
+
+def run(sizes, repeat=DEFAULT_REPEAT, only=None):
+    """Time every case at every size; the query result cache is disabled so each run does the work"""
+    results = {}
+    for size in sizes:
+        db = DatabaseManager(bench_database(size), cache=None)
+        ctx = _prepare(db)
+        results[str(size)] = {}
+        for name, func in CASES:
+            if only and not any(pattern in name for pattern in only):
+                continue
+            timing = time_case(func, db, ctx, repeat)
+            results[str(size)][name] = timing
+            print(f"  {size:>10,}  {name:<42} {timing['median_ms']:>10.2f} ms")
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        'commit': _git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    """(size, case, baseline ms, current ms, ratio) for every case whose median moved by more than threshold"""
+    changes = []
+    for size, cases in results.items():
+        for name, timing in cases.items():
+            before = baseline.get(size, {}).get(name)
+            if before is None or before['median_ms'] <= 0:
+                continue
+            ratio = timing['median_ms'] / before['median_ms']
+            if abs(ratio - 1) > threshold and abs(timing['median_ms'] - before['median_ms']) >= min_delta_ms:
+                changes.append((size, name, before['median_ms'], timing['median_ms'], ratio))
+    return changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark DatabaseManager queries and dashboard data preparation")
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated incident/ticket counts")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--only', action='append', help="run only cases whose name contains this (repeatable)")
+    parser.add_argument('--output', default="bench_results.json")
+    parser.add_argument('--baseline', help="results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="relative change in median that counts as a regression or improvement")
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="ignore changes smaller than this many milliseconds")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    report = {'environment': environment(), 'results': run(sizes, args.repeat, args.only)}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    changes = compare(report['results'], baseline['results'], args.threshold, args.min_delta_ms)
+    regressions = [change for change in changes if change[4] > 1]
+    print(f"\nCompared with {args.baseline} (commit {baseline['environment'].get('commit')}):")
+    if not changes:
+        print(f"  no case moved by more than {args.threshold:.0%}")
+    for size, name, before, after, ratio in sorted(changes, key=lambda change: -change[4]):
+        marker = '❌' if ratio > 1 else '✅'
+        print(f"  {marker} {int(size):>10,}  {name:<42} {before:>10.2f} -> {after:>10.2f} ms ({ratio:.2f}x)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+import os
+
+import plotly.express as px
+
+from analytics import downsample
+
+# Points a line can usefully show per pixel of chart width, and the width of
+# a full-width chart on the wide page layout
+POINTS_PER_PIXEL = float(os.getenv('CHART_POINTS_PER_PIXEL', '1'))
+CHART_WIDTH_PX = int(os.getenv('CHART_WIDTH_PX', '1200'))
+# Above this many points in a figure lines are drawn with WebGL (Scattergl)
+WEBGL_THRESHOLD = int(os.getenv('CHART_WEBGL_THRESHOLD', '1000'))
+
+
+def point_budget(width=1.0):
+    """Most points worth sending per series for a chart spanning width of the page"""
+    return max(3, int(CHART_WIDTH_PX * width * POINTS_PER_PIXEL))
+
+
+def time_series_figure(frame, x, y, title, color=None, markers=False, width=1.0):
+    """Line chart with each series downsampled to the point budget of its width
+
+    Series longer than the budget are reduced with LTTB, which keeps peaks
+    and troughs, so the figure payload stays bounded however long the
+    history is. Large figures switch to WebGL traces; markers are dropped
+    there since they would hide the line.
+    """
+    frame = downsample(frame, x, y, point_budget(width), by=color)
+    webgl = len(frame) > WEBGL_THRESHOLD
+    return px.line(
+        frame,
+        x=x,
+        y=y,
+        color=color,
+        title=title,
+        markers=markers and not webgl,
+        render_mode='webgl' if webgl else 'svg'
+    )
+
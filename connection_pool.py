@@ -0,0 +1,170 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+DEFAULT_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DEFAULT_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+DEFAULT_STORAGE_MODE = os.getenv('DB_STORAGE_MODE', 'wal')
+
+# PRAGMAs applied to every new connection, per storage mode.
+# "wal" lets the dashboards keep reading while the writer thread commits;
+# "rollback" keeps SQLite's stock journal for filesystems without shared memory.
+STORAGE_MODES = {
+    'wal': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': int(os.getenv('DB_MMAP_SIZE', str(256 * 1024 * 1024))),
+        'cache_size': -int(os.getenv('DB_CACHE_SIZE_KB', '32768')),
+        'temp_store': 'MEMORY',
+    },
+    'rollback': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+    },
+}
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes free in time"""
+
+
+def configure_connection(conn, storage_mode=DEFAULT_STORAGE_MODE, timeout=DEFAULT_POOL_TIMEOUT):
+    """Apply the storage-mode PRAGMAs to a freshly opened connection"""
+    if storage_mode not in STORAGE_MODES:
+        raise ValueError(f"Unknown storage mode: {storage_mode}")
+    conn.execute(f"PRAGMA busy_timeout = {int(timeout * 1000)}")
+    for pragma, value in STORAGE_MODES[storage_mode].items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+    return conn
+
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections shared by every DatabaseManager
+
+    A connection is handed to one thread at a time. Nested checkouts on the
+    same thread reuse the connection the thread already holds, so helper
+    methods can call each other without draining the pool.
+    """
+
+    def __init__(self, db_path, size=DEFAULT_POOL_SIZE, timeout=DEFAULT_POOL_TIMEOUT,
+                 storage_mode=DEFAULT_STORAGE_MODE):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.storage_mode = storage_mode
+        self._idle = queue.LifoQueue()
+        self._all = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._closed = False
+
+    def _new_connection(self):
+        """Open a connection that may be handed between threads"""
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        return configure_connection(conn, self.storage_mode, self.timeout)
+
+    def _checkout(self):
+        """Take an idle connection, opening a new one while under the size limit"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed")
+            if len(self._all) < self.size:
+                conn = self._new_connection()
+                self._all.append(conn)
+                return conn
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolTimeout(
+                f"No database connection available after {self.timeout}s "
+                f"(pool size {self.size})"
+            )
+
+    def acquire(self):
+        """Get the calling thread's connection, checking one out if needed"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.depth += 1
+            return conn
+
+        conn = self._checkout()
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def release(self):
+        """Return the calling thread's connection once its outermost user is done"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+
+        self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+
+        if self._closed:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager around acquire/release"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release()
+
+    def close_all(self):
+        """Close every idle connection; busy ones close when released"""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path, size=None, storage_mode=None):
+    """Return the process-wide pool for a database file, creating it once
+
+    Streamlit re-executes page scripts on every interaction, so pools are kept
+    at module level where they survive reruns and are shared by all sessions.
+    """
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path, size or DEFAULT_POOL_SIZE,
+                                  storage_mode=storage_mode or DEFAULT_STORAGE_MODE)
+            _pools[key] = pool
+        return pool
+
+
+def close_pool(db_path):
+    """Close and forget the pool for a database file"""
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.pop(key, None)
+    if pool:
+        pool.close_all()
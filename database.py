@@ -1,164 +1,621 @@
-import sqlite3
+import os
+import re
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
+from access import scope_query
+from connection_pool import get_pool
+from write_queue import CHANGE_LOG_KEEP, PRUNE_ROW_CHANGES, get_writer
+from ingest import DEFAULT_BATCH_SIZE, bulk_insert
+from migrations import (ID_COLUMNS, ROLLUP_TABLES, SEARCH_TABLES, SUMMARY_TABLES, VERSIONED_TABLES,
+                        explain_dashboard_queries, migrate_once)
+from result_cache import query_cache
+from schemas import apply_schema
+
+# Tables whose query results are shared through the process-wide cache, with
+# the trigger-maintained tables derived from them (a write invalidates all of them)
+CACHED_TABLES = {
+    table: (table,) + tuple(derived[table][0] for derived in (SUMMARY_TABLES, ROLLUP_TABLES, SEARCH_TABLES)
+                   if table in derived)
+    for table in ID_COLUMNS
+}
+
+def fts_query(text):
+    """FTS5 MATCH expression requiring every word of text as a quoted prefix; None if text has no words"""
+    words = re.findall(r"\w+", text or "")
+    return " ".join(f'"{word}"*' for word in words) or None
+
+
+# Columns the dataset catalog can be sorted by
+CATALOG_SORT_COLUMNS = ('size_mb', 'row_count', 'upload_date', 'dataset_name')
+
+# Longest date range (in days) each rollup grain serves before the next coarser one takes over
+GRANULARITY_SPANS = (('day', 92), ('week', 730), ('month', None))
+
+
+def choose_granularity(start, end):
+    """Finest rollup grain that keeps a date range to at most a few hundred buckets"""
+    span = (pd.Timestamp(end) - pd.Timestamp(start)).days
+    for granularity, max_days in GRANULARITY_SPANS:
+        if max_days is None or span <= max_days:
+            return granularity
+
+
+def _bucket_start(day, granularity):
+    """First day of the rollup bucket containing a date"""
+    day = pd.Timestamp(day).date()
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
 
 class DatabaseManager:
     """Manages all database operations for the Intelligence Platform"""
-    
-    def __init__(self, db_path="intelligence.db"):
+
+    def __init__(self, db_path="intelligence.db", pool_size=None, storage_mode=None, cache=query_cache, role=None):
         self.db_path = db_path
-        self.conn = None
-        self.cursor = None
-    
+        self.cache = cache
+        # Reads see only this role's slice of the data (see access.ROLE_SCOPES); None reads everything
+        self.role = role
+        self._cache_prefix = os.path.abspath(db_path)
+        # Pools and the writer are shared per database file, so creating a manager on every rerun is cheap
+        self.pool = get_pool(db_path, pool_size, storage_mode)
+        self.writer = get_writer(db_path, storage_mode)
+        migrate_once(self.pool)
+
     def connect(self):
-        """Establish database connection"""
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        self.cursor = self.conn.cursor()
-        return self.conn
-    
+        """Check out this thread's pooled connection (pair with close())"""
+        return self.pool.acquire()
+
     def close(self):
-        """Close database connection"""
-        if self.conn:
-            self.conn.close()
-    
+        """Hand this thread's connection back to the pool"""
+        self.pool.release()
+
+    def _tables_in(self, query):
+        """Cached source tables a statement reads or writes, directly or through a derived table"""
+        return [table for table, names in CACHED_TABLES.items()
+                if re.search(rf"\b({'|'.join(names)})\b", query)]
+
+    def get_data_versions(self, tables=VERSIONED_TABLES):
+        """Current version counters of tables as a tuple, in the order given"""
+        placeholders = ", ".join("?" for _ in tables)
+        with self.pool.connection() as conn:
+            versions = dict(conn.execute(
+                f"SELECT table_name, version FROM table_versions WHERE table_name IN ({placeholders})",
+                tuple(tables)
+            ).fetchall())
+        return tuple(versions[table] for table in tables)
+
+    def get_data_version(self, table):
+        """Current version counter of one table"""
+        return self.get_data_versions((table,))[0]
+
+    def _cached(self, kind, query, params, compute):
+        """Serve a read from the shared result cache, keyed on the versions of the tables it touches"""
+        tables = self._tables_in(query)
+        if self.cache is None or not tables:
+            return compute()
+        key = (self._cache_prefix, kind, query, tuple(params), self.get_data_versions(tables))
+        tags = [(self._cache_prefix, table) for table in tables]
+        return self.cache.get_or_compute(key, compute, tags)
+
+    def _invalidate(self, query):
+        """Drop cached results for the tables a write touched, freeing them before LRU eviction would"""
+        if self.cache is not None:
+            for table in self._tables_in(query):
+                self.cache.invalidate((self._cache_prefix, table))
+
+    def _scoped(self, query):
+        """A read query restricted to the rows this manager's role may see"""
+        return scope_query(query, self.role) if self.role is not None else query
+
+    def _read(self, query, params=(), schema=None):
+        """Run a SELECT and return the result as a DataFrame, typed by a table schema if given"""
+        query = self._scoped(query)
+
+        def compute():
+            with self.pool.connection() as conn:
+                df = pd.read_sql_query(query, conn, params=params)
+            return apply_schema(df, schema) if schema else df
+        return self._cached('frame', query, params, compute)
+
+    def _fetchone(self, query, params=()):
+        """Run a SELECT and return its first row"""
+        query = self._scoped(query)
+        with self.pool.connection() as conn:
+            return conn.execute(query, params).fetchone()
+
+    def _fetchdict(self, query, params=()):
+        """Run a single-row aggregate SELECT and return it as a dict"""
+        query = self._scoped(query)
+
+        def compute():
+            with self.pool.connection() as conn:
+                cursor = conn.execute(query, params)
+                row = cursor.fetchone()
+                return dict(zip([col[0] for col in cursor.description], row))
+        return self._cached('row', query, params, compute)
+
+    def explain_dashboard_queries(self):
+        """EXPLAIN QUERY PLAN report of (name, uses_index, plan) for the dashboard queries"""
+        with self.pool.connection() as conn:
+            return explain_dashboard_queries(conn)
+
+    def _write(self, query, params=()):
+        """Send an INSERT/UPDATE/DELETE through the serialized writer and wait for its commit"""
+        try:
+            return self.writer.execute(query, params)
+        finally:
+            self._invalidate(query)
+
+    def bulk_insert(self, table, rows, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+        """Validate, deduplicate and insert a DataFrame or iterable of DataFrames; returns an ImportReport"""
+        try:
+            return bulk_insert(self.writer, table, rows, batch_size, progress)
+        finally:
+            self._invalidate(table)
+
     # Login
-    
+
     def verify_user(self, username, password_hash):
         """Verify user credentials"""
-        self.connect()
         query = "SELECT username, role FROM users WHERE username = ? AND password_hash = ?"
-        result = self.cursor.execute(query, (username, password_hash)).fetchone()
-        self.close()
-        return result
-    
+        return self._fetchone(query, (username, password_hash))
+
+    def get_user_credentials(self, username):
+        """Get username, password hash and role for a login attempt"""
+        query = "SELECT username, password_hash, role FROM users WHERE username = ?"
+        return self._fetchone(query, (username,))
+
     def get_user_role(self, username):
         """Get user role"""
-        self.connect()
         query = "SELECT role FROM users WHERE username = ?"
-        result = self.cursor.execute(query, (username,)).fetchone()
-        self.close()
+        result = self._fetchone(query, (username,))
         return result[0] if result else None
-    
+
     # Cybersecurity
-    
+
     def get_all_incidents(self):
         """Retrieve all cybersecurity incidents"""
-        self.connect()
         query = "SELECT * FROM cyber_incidents"
-        df = pd.read_sql_query(query, self.conn)
-        self.close()
-        return df
-    
+        return self._read(query, schema='cyber_incidents')
+
     def get_incidents_by_severity(self, severity):
         """Get incidents filtered by severity"""
-        self.connect()
         query = "SELECT * FROM cyber_incidents WHERE severity = ?"
-        df = pd.read_sql_query(query, self.conn, params=(severity,))
-        self.close()
-        return df
-    
+        return self._read(query, (severity,), schema='cyber_incidents')
+
     def get_unresolved_incidents(self):
         """Get all unresolved incidents"""
-        self.connect()
-        query = "SELECT * FROM cyber_incidents WHERE status != 'Resolved'"
-        df = pd.read_sql_query(query, self.conn)
-        self.close()
-        return df
-    
+        # Written as two ranges so the status index can serve it
+        query = "SELECT * FROM cyber_incidents WHERE status < 'Resolved' OR status > 'Resolved'"
+        return self._read(query, schema='cyber_incidents')
+
     def update_incident_status(self, incident_id, new_status):
         """Update incident status"""
-        self.connect()
         query = "UPDATE cyber_incidents SET status = ? WHERE incident_id = ?"
-        self.cursor.execute(query, (new_status, incident_id))
-        self.conn.commit()
-        self.close()
-    
+        self._write(query, (new_status, incident_id))
+
     def add_incident(self, incident_type, severity, status, description):
         """Add new incident"""
-        self.connect()
-        query = """INSERT INTO cyber_incidents 
-                   (incident_type, severity, status, description, reported_date) 
+        query = """INSERT INTO cyber_incidents
+                   (incident_type, severity, status, description, reported_date)
                    VALUES (?, ?, ?, ?, ?)"""
-        self.cursor.execute(query, (incident_type, severity, status, description, datetime.now()))
-        self.conn.commit()
-        self.close()
-    
+        self._write(query, (incident_type, severity, status, description, datetime.now()))
+
+    def bulk_insert_incidents(self, rows, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+        """Import incidents, skipping ones already present (same reported_date, type and description)"""
+        return self.bulk_insert('cyber_incidents', rows, batch_size, progress)
+
+    def get_incident_kpis(self):
+        """Header metrics for the Cybersecurity dashboard, read from the trigger-maintained summary"""
+        query = """SELECT CAST(TOTAL(incident_count) AS INTEGER) AS total_incidents,
+                          CAST(TOTAL(CASE WHEN status != 'Resolved' THEN incident_count END) AS INTEGER) AS unresolved,
+                          CAST(TOTAL(CASE WHEN severity = 'High' THEN incident_count END) AS INTEGER) AS high_severity,
+                          TOTAL(resolution_days_sum) / NULLIF(TOTAL(resolved_count), 0) AS avg_resolution_days
+                   FROM kpi_incidents"""
+        return self._fetchdict(query)
+
+    def get_resolution_time_by_incident_type(self):
+        """Average resolution days and resolved count per incident type, slowest first"""
+        query = """SELECT incident_type,
+                          TOTAL(resolution_days_sum) / NULLIF(TOTAL(resolved_count), 0) AS avg_resolution_days,
+                          CAST(TOTAL(resolved_count) AS INTEGER) AS resolved_count
+                   FROM kpi_incidents
+                   GROUP BY incident_type
+                   HAVING TOTAL(incident_count) > 0
+                   ORDER BY avg_resolution_days DESC"""
+        return self._read(query)
+
+    def get_daily_incident_counts(self):
+        """Number of incidents reported per calendar day"""
+        return self.get_incident_trend(granularity='day')
+
+    def get_incident_trend(self, start=None, end=None, granularity=None, by=None):
+        """Incident counts per day/week/month bucket, optionally split by incident_type or severity"""
+        return self._get_trend('cyber_incidents', start, end, granularity, by)
+
+    def get_incident_type_counts(self):
+        """Number of incidents per type, most common first"""
+        query = """SELECT incident_type, CAST(TOTAL(incident_count) AS INTEGER) AS count
+                   FROM kpi_incidents
+                   GROUP BY incident_type
+                   HAVING count > 0
+                   ORDER BY count DESC"""
+        return self._read(query)
+
+    def get_critical_incidents(self):
+        """High-severity unresolved incidents, newest first"""
+        query = """SELECT incident_id, incident_type, severity, status, reported_date, description
+                   FROM cyber_incidents
+                   WHERE severity = 'High' AND status != 'Resolved'
+                   ORDER BY reported_date DESC"""
+        return self._read(query, schema='cyber_incidents')
+
+    def count_critical_incidents(self):
+        """Number of high-severity unresolved incidents, from the KPI summary"""
+        query = """SELECT CAST(TOTAL(incident_count) AS INTEGER) AS critical
+                   FROM kpi_incidents
+                   WHERE severity = 'High' AND status != 'Resolved'"""
+        return self._fetchdict(query)['critical']
+
+    def page_critical_incidents(self, after=None, page_size=25):
+        """One page of high-severity unresolved incidents, newest first; returns (frame, next_cursor)"""
+        return self._keyset_page(
+            'cyber_incidents',
+            ['incident_id', 'incident_type', 'severity', 'status', 'reported_date', 'description'],
+            'reported_date', True, after, page_size,
+            conditions=["severity = 'High'", "status != 'Resolved'"]
+        )
+
     # Data Science
-    
+
     def get_all_datasets(self):
         """Retrieve all datasets metadata"""
-        self.connect()
         query = "SELECT * FROM datasets_metadata"
-        df = pd.read_sql_query(query, self.conn)
-        self.close()
-        return df
-    
+        return self._read(query, schema='datasets_metadata')
+
     def get_datasets_by_source(self, source):
         """Get datasets filtered by source"""
-        self.connect()
         query = "SELECT * FROM datasets_metadata WHERE source = ?"
-        df = pd.read_sql_query(query, self.conn, params=(source,))
-        self.close()
-        return df
-    
+        return self._read(query, (source,), schema='datasets_metadata')
+
     def add_dataset(self, dataset_name, source, size_mb, row_count, upload_date):
         """Add new dataset"""
-        self.connect()
-        query = """INSERT INTO datasets_metadata 
-                   (dataset_name, source, size_mb, row_count, upload_date) 
+        query = """INSERT INTO datasets_metadata
+                   (dataset_name, source, size_mb, row_count, upload_date)
                    VALUES (?, ?, ?, ?, ?)"""
-        self.cursor.execute(query, (dataset_name, source, size_mb, row_count, upload_date))
-        self.conn.commit()
-        self.close()
-    
+        self._write(query, (dataset_name, source, size_mb, row_count, upload_date))
+
+    def bulk_insert_datasets(self, rows, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+        """Import dataset metadata, skipping names already in the catalog"""
+        return self.bulk_insert('datasets_metadata', rows, batch_size, progress)
+
     def delete_dataset(self, dataset_id):
         """Delete dataset"""
-        self.connect()
         query = "DELETE FROM datasets_metadata WHERE dataset_id = ?"
-        self.cursor.execute(query, (dataset_id,))
-        self.conn.commit()
-        self.close()
-    
+        self._write(query, (dataset_id,))
+
+    def get_dataset_kpis(self):
+        """Header metrics for the Data Science dashboard, read from the trigger-maintained summary"""
+        query = """SELECT CAST(TOTAL(dataset_count) AS INTEGER) AS total_datasets,
+                          TOTAL(size_mb_sum) AS total_storage_mb,
+                          CAST(TOTAL(row_count_sum) AS INTEGER) AS total_rows,
+                          TOTAL(size_mb_sum) / NULLIF(TOTAL(dataset_count), 0) AS avg_size_mb
+                   FROM kpi_datasets"""
+        return self._fetchdict(query)
+
+    def get_top_datasets(self, limit=10):
+        """Largest datasets by storage"""
+        query = """SELECT dataset_id, dataset_name, source, size_mb
+                   FROM datasets_metadata
+                   ORDER BY size_mb DESC
+                   LIMIT ?"""
+        return self._read(query, (limit,), schema='datasets_metadata')
+
+    def get_source_stats(self):
+        """Storage, rows and dataset count per source, largest storage first"""
+        query = """SELECT source,
+                          size_mb_sum AS total_size_mb,
+                          CAST(row_count_sum AS INTEGER) AS total_rows,
+                          CAST(dataset_count AS INTEGER) AS dataset_count
+                   FROM kpi_datasets
+                   WHERE dataset_count > 0
+                   ORDER BY total_size_mb DESC"""
+        return self._read(query)
+
+    def _dataset_filters(self, sources=None, name_search=None):
+        conditions, params = [], []
+        if sources:
+            conditions.append(f"source IN ({', '.join('?' for _ in sources)})")
+            params += list(sources)
+        match = fts_query(name_search)
+        if match:
+            conditions.append("dataset_id IN (SELECT rowid FROM datasets_fts WHERE datasets_fts MATCH ?)")
+            params.append(match)
+        return conditions, params
+
+    def page_datasets(self, sort_by='size_mb', descending=True, after=None, page_size=25,
+                      sources=None, name_search=None):
+        """One page of the dataset catalog, optionally filtered; returns (frame, next_cursor)"""
+        if sort_by not in CATALOG_SORT_COLUMNS:
+            raise ValueError(f"Cannot sort datasets by {sort_by!r}")
+        conditions, params = self._dataset_filters(sources, name_search)
+        return self._keyset_page(
+            'datasets_metadata',
+            ['dataset_id', 'dataset_name', 'source', 'size_mb', 'row_count', 'upload_date'],
+            sort_by, descending, after, page_size, conditions, params
+        )
+
+    def count_datasets(self, sources=None, name_search=None):
+        """Number of datasets matching the catalog filters"""
+        if not fts_query(name_search):
+            # Source filters alone are answered by the per-source summary
+            query = "SELECT CAST(TOTAL(dataset_count) AS INTEGER) AS matches FROM kpi_datasets"
+            params = []
+            if sources:
+                query += f" WHERE source IN ({', '.join('?' for _ in sources)})"
+                params = list(sources)
+            return self._fetchdict(query, params)['matches']
+        conditions, params = self._dataset_filters(sources, name_search)
+        query = f"SELECT COUNT(*) AS matches FROM datasets_metadata WHERE {' AND '.join(conditions)}"
+        return self._fetchdict(query, params)['matches']
+
+    def get_dataset_sources(self):
+        """Sources that have datasets, from the KPI summary"""
+        query = "SELECT DISTINCT source FROM kpi_datasets WHERE dataset_count > 0 ORDER BY source"
+        return self._read(query)['source'].tolist()
+
+    def find_datasets(self, text, limit=20):
+        """Datasets for a picker: the one with id text, else the best name matches"""
+        return self._find('datasets_metadata', text, limit)
+
     # IT Operations
-    
+
     def get_all_tickets(self):
         """Retrieve all IT tickets"""
-        self.connect()
         query = "SELECT * FROM it_tickets"
-        df = pd.read_sql_query(query, self.conn)
-        self.close()
-        return df
-    
+        return self._read(query, schema='it_tickets')
+
     def get_tickets_by_status(self, status):
         """Get tickets filtered by status"""
-        self.connect()
         query = "SELECT * FROM it_tickets WHERE status = ?"
-        df = pd.read_sql_query(query, self.conn, params=(status,))
-        self.close()
-        return df
-    
+        return self._read(query, (status,), schema='it_tickets')
+
     def get_tickets_by_assignee(self, assignee):
         """Get tickets filtered by assigned staff"""
-        self.connect()
         query = "SELECT * FROM it_tickets WHERE assigned_to = ?"
-        df = pd.read_sql_query(query, self.conn, params=(assignee,))
-        self.close()
-        return df
-    
+        return self._read(query, (assignee,), schema='it_tickets')
+
     def update_ticket_status(self, ticket_id, new_status):
         """Update ticket status"""
-        self.connect()
         query = "UPDATE it_tickets SET status = ? WHERE ticket_id = ?"
-        self.cursor.execute(query, (new_status, ticket_id))
-        self.conn.commit()
-        self.close()
-    
+        self._write(query, (new_status, ticket_id))
+
     def add_ticket(self, title, priority, status, assigned_to, description):
         """Add new ticket"""
-        self.connect()
-        query = """INSERT INTO it_tickets 
-                   (title, priority, status, assigned_to, description, created_date) 
+        query = """INSERT INTO it_tickets
+                   (title, priority, status, assigned_to, description, created_date)
                    VALUES (?, ?, ?, ?, ?, ?)"""
-        self.cursor.execute(query, (title, priority, status, assigned_to, description, datetime.now()))
-        self.conn.commit()
-        self.close()
\ No newline at end of file
+        self._write(query, (title, priority, status, assigned_to, description, datetime.now()))
+
+    def bulk_insert_tickets(self, rows, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+        """Import tickets, skipping ones already present (same created_date, title and assignee)"""
+        return self.bulk_insert('it_tickets', rows, batch_size, progress)
+
+    def get_ticket_kpis(self):
+        """Header metrics for the IT Operations dashboard, read from the trigger-maintained summary"""
+        query = """SELECT CAST(TOTAL(ticket_count) AS INTEGER) AS total_tickets,
+                          CAST(TOTAL(CASE WHEN status IN ('Open', 'In Progress') THEN ticket_count END) AS INTEGER) AS open_tickets,
+                          CAST(TOTAL(CASE WHEN priority = 'High' THEN ticket_count END) AS INTEGER) AS high_priority,
+                          TOTAL(resolution_days_sum) / NULLIF(TOTAL(resolved_count), 0) AS avg_resolution_days
+                   FROM kpi_tickets"""
+        return self._fetchdict(query)
+
+    def get_staff_performance(self):
+        """Average resolution days and ticket count per assignee, slowest first"""
+        query = """SELECT assigned_to,
+                          TOTAL(resolution_days_sum) / NULLIF(TOTAL(resolved_count), 0) AS avg_resolution_days,
+                          CAST(TOTAL(ticket_count) AS INTEGER) AS ticket_count
+                   FROM kpi_tickets
+                   GROUP BY assigned_to
+                   HAVING ticket_count > 0
+                   ORDER BY avg_resolution_days DESC"""
+        return self._read(query)
+
+    def get_status_impact(self):
+        """Average resolution days and ticket count per status, slowest first"""
+        query = """SELECT status,
+                          TOTAL(resolution_days_sum) / NULLIF(TOTAL(resolved_count), 0) AS avg_resolution_days,
+                          CAST(TOTAL(ticket_count) AS INTEGER) AS ticket_count
+                   FROM kpi_tickets
+                   GROUP BY status
+                   HAVING ticket_count > 0
+                   ORDER BY avg_resolution_days DESC"""
+        return self._read(query)
+
+    def get_ticket_trend(self, start=None, end=None, granularity=None, by=None):
+        """Ticket counts per day/week/month bucket, optionally split by priority or assigned_to"""
+        return self._get_trend('it_tickets', start, end, granularity, by)
+
+    def find_tickets(self, text, limit=20):
+        """Tickets for a picker: the one with id text, else the best title/description matches"""
+        return self._find('it_tickets', text, limit)
+
+    # Incremental refresh
+
+    def get_table_delta(self, table, after_id=0, after_change_id=0):
+        """(rows, touched_ids, change_id, complete) for rows added or changed since after_id/after_change_id"""
+        id_col = ID_COLUMNS[table]
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN")
+            try:
+                change_id = conn.execute(
+                    "SELECT COALESCE(MAX(change_id), 0) FROM row_changes"
+                ).fetchone()[0]
+                pruned_through = conn.execute(
+                    """SELECT COALESCE((SELECT MIN(change_id) - 1 FROM row_changes),
+                                       (SELECT seq FROM sqlite_sequence WHERE name = 'row_changes'),
+                                       0)"""
+                ).fetchone()[0]
+                if after_change_id < pruned_through and (after_id or after_change_id):
+                    return None, None, change_id, False
+
+                # Two primary-key lookups: rows above after_id, then rows at or below
+                # it that the log reports as changed (none on a first load)
+                def read(condition, params):
+                    query = f"SELECT * FROM {table} WHERE {condition} ORDER BY {id_col}"
+                    return pd.read_sql_query(self._scoped(query), conn, params=params)
+
+                rows = read(f"{id_col} > ?", (after_id,))
+                touched_ids = []
+                if after_id or after_change_id:
+                    changes = """SELECT DISTINCT row_id FROM row_changes
+                                 WHERE table_name = ? AND change_id > ? AND change_id <= ?"""
+                    window = (table, after_change_id, change_id)
+                    touched_ids = [row[0] for row in conn.execute(changes, window)]
+                    if touched_ids:
+                        updated = read(f"{id_col} <= ? AND {id_col} IN ({changes})", (after_id, *window))
+                        rows = pd.concat([updated, rows], ignore_index=True)
+                rows = apply_schema(rows, table)
+            finally:
+                conn.rollback()
+        return rows, touched_ids, change_id, True
+
+    def prune_row_changes(self, keep=CHANGE_LOG_KEEP):
+        """Trim the change log to its newest keep entries; stale incremental frames then reload"""
+        self._write(PRUNE_ROW_CHANGES, (keep,))
+
+    # Pagination
+
+    def _keyset_page(self, table, columns, sort_col, descending, after, page_size, conditions=(), params=()):
+        """(frame, next_cursor) for one page ordered by (sort_col, id) after a cursor; None cursor on the last page"""
+        id_col = ID_COLUMNS[table]
+        conditions, params = list(conditions), list(params)
+        if after is not None:
+            conditions.append(f"({sort_col}, {id_col}) {'<' if descending else '>'} (?, ?)")
+            params += list(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        direction = 'DESC' if descending else 'ASC'
+        query = f"""SELECT {', '.join(columns)} FROM {table} {where}
+                    ORDER BY {sort_col} {direction}, {id_col} {direction}
+                    LIMIT ?"""
+        rows = self._read(query, (*params, page_size + 1))
+
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows.iloc[:page_size].copy()
+            last_value = rows[sort_col].iloc[-1]
+            next_cursor = (last_value.item() if hasattr(last_value, 'item') else last_value,
+                           int(rows[id_col].iloc[-1]))
+        return apply_schema(rows, table), next_cursor
+
+    # Full-text search
+
+    def _search(self, table, text, limit):
+        """Rows of table whose indexed text matches every word of text as a prefix, best match first"""
+        index, _ = SEARCH_TABLES[table]
+        match = fts_query(text)
+        if match is None:
+            return self._read(f"SELECT * FROM {table} LIMIT 0", schema=table)
+        query = f"""SELECT t.* FROM {index}
+                    JOIN {table} AS t ON t.{ID_COLUMNS[table]} = {index}.rowid
+                    WHERE {index} MATCH ?
+                    ORDER BY {index}.rank
+                    LIMIT ?"""
+        return self._read(query, (match, limit), schema=table)
+
+    def _find(self, table, text, limit):
+        """One row looked up by id when text is a number, else a full-text search"""
+        if text.strip().isdigit():
+            query = f"SELECT * FROM {table} WHERE {ID_COLUMNS[table]} = ?"
+            return self._read(query, (int(text),), schema=table)
+        return self._search(table, text, limit)
+
+    def search_incidents(self, text, limit=50):
+        """Incidents whose description matches the search words"""
+        return self._search('cyber_incidents', text, limit)
+
+    def search_tickets(self, text, limit=50):
+        """Tickets whose title or description matches the search words"""
+        return self._search('it_tickets', text, limit)
+
+    def search_datasets(self, text, limit=50):
+        """Datasets whose name matches the search words"""
+        return self._search('datasets_metadata', text, limit)
+
+    # Streaming reads
+
+    def iter_incidents(self, chunksize=50000, columns=None, where=None, params=()):
+        """Yield typed cyber_incidents chunks of at most chunksize rows"""
+        return self._iter_table('cyber_incidents', chunksize, columns, where, params)
+
+    def iter_tickets(self, chunksize=50000, columns=None, where=None, params=()):
+        """Yield typed it_tickets chunks of at most chunksize rows"""
+        return self._iter_table('it_tickets', chunksize, columns, where, params)
+
+    def iter_datasets(self, chunksize=50000, columns=None, where=None, params=()):
+        """Yield typed datasets_metadata chunks of at most chunksize rows"""
+        return self._iter_table('datasets_metadata', chunksize, columns, where, params)
+
+    def _table_columns(self, table):
+        with self.pool.connection() as conn:
+            return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+    def _iter_table(self, table, chunksize, columns, where, params):
+        """Walk a table in primary-key order, streaming one query in chunks of at most chunksize rows"""
+        id_col = ID_COLUMNS[table]
+        known = self._table_columns(table)
+        columns = list(columns) if columns else known
+        unknown = [col for col in columns if col not in known]
+        if unknown:
+            raise ValueError(f"Unknown {table} columns: {unknown}")
+
+        # where is trusted SQL; its values are bound through params
+        condition = f"WHERE {where}" if where else ""
+        query = self._scoped(f"SELECT {', '.join(columns)} FROM {table} {condition} ORDER BY {id_col}")
+        with self.pool.connection() as conn:
+            cursor = conn.execute(query, params)
+            try:
+                while True:
+                    rows = cursor.fetchmany(chunksize)
+                    if not rows:
+                        return
+                    yield apply_schema(pd.DataFrame.from_records(rows, columns=columns), table)
+            finally:
+                cursor.close()
+
+    # Trend rollups
+
+    def get_trend_date_range(self, table):
+        """First and last day present in a table's trend rollup, as dates (None if empty)"""
+        rollup = ROLLUP_TABLES[table][0]
+        query = f"SELECT MIN(bucket) AS first_day, MAX(bucket) AS last_day FROM {rollup} WHERE granularity = 'day'"
+        bounds = self._fetchdict(query)
+        if bounds['first_day'] is None:
+            return None, None
+        return pd.Timestamp(bounds['first_day']).date(), pd.Timestamp(bounds['last_day']).date()
+
+    def _get_trend(self, table, start, end, granularity, by):
+        """Read a date range from the rollup grain that suits it, picked from the span when granularity is None"""
+        rollup, date_col, dims, count_col = ROLLUP_TABLES[table]
+        if by is not None and by not in dims:
+            raise ValueError(f"Cannot split {table} trend by {by!r}; choose one of {dims}")
+
+        first_day, last_day = self.get_trend_date_range(table)
+        if first_day is None:
+            return pd.DataFrame(columns=['date'] + ([by] if by else []) + ['count'])
+        start = pd.Timestamp(start).date() if start is not None else first_day
+        end = pd.Timestamp(end).date() if end is not None else last_day
+        granularity = granularity or choose_granularity(start, end)
+
+        split = f"{by}, " if by else ""
+        query = f"""SELECT bucket AS date, {split}SUM({count_col}) AS count
+                    FROM {rollup}
+                    WHERE granularity = ? AND bucket BETWEEN ? AND ?
+                    GROUP BY bucket{', ' + by if by else ''}
+                    HAVING count > 0
+                    ORDER BY bucket"""
+        params = (granularity, _bucket_start(start, granularity).isoformat(), end.isoformat())
+        return self._read(query, params)
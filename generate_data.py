@@ -0,0 +1,250 @@
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+from auth_service import hash_password
+from connection_pool import DEFAULT_STORAGE_MODE, configure_connection
+from migrations import BASE_SCHEMA, apply_migrations
+
+DEFAULT_BATCH_SIZE = 100000
+
+INCIDENT_TYPES = np.array(['Phishing', 'Malware', 'DDoS', 'Unauthorized Access', 'Data Breach'])
+SEVERITIES = np.array(['Low', 'Medium', 'High'])
+INCIDENT_STATUSES = np.array(['Open', 'In Progress', 'Resolved'])
+PRIORITIES = np.array(['Low', 'Medium', 'High'])
+TICKET_STATUSES = np.array(['Open', 'In Progress', 'Waiting for User', 'Resolved'])
+STAFF = np.array(['Alice Johnson', 'Bob Smith', 'Charlie Davis', 'Diana Martinez'])
+TICKET_TITLES = np.array([
+    'Password reset needed', 'Cannot access email', 'Printer not working',
+    'Software installation', 'Network issue', 'VPN problem',
+    'Computer slow', 'Application crash', 'New user setup',
+    'Hardware replacement'
+])
+SOURCES = np.array(['Marketing', 'IT', 'Finance', 'Operations'])
+
+DEMO_USERS = [
+    ('admin', 'admin123', 'Admin'),
+    ('cyber_analyst', 'cyber123', 'Cybersecurity'),
+    ('data_scientist', 'data123', 'Data Science'),
+    ('it_support', 'it123', 'IT Operations')
+]
+
+# Skew profiles. 'problems' scales up the patterns planted by
+# setup_database_with_problems.py: slow and growing phishing, a slow and
+# overloaded Bob Smith, large and stale Marketing datasets. 'uniform' plants
+# none of them. Resolution times are (min, max) days; dataset ages are
+# fractions of the date span.
+PROFILES = {
+    'problems': {
+        'phishing_extra': 0.4,
+        'phishing_high_open': 0.25,
+        'incident_days': {'Phishing': (12, 18)},
+        'staff_days': {'Bob Smith': (10, 15), 'Diana Martinez': (7, 11),
+                       'Charlie Davis': (4, 7), 'Alice Johnson': (3, 5)},
+        'waiting_backdate': 0.3,
+        'bob_open_share': 0.35,
+        'alice_open_moved': 0.6,
+        'source_weights': (0.45, 0.2, 0.2, 0.15),
+        'source_sizes': {'Marketing': (100, 600), 'IT': (60, 120), 'Finance': (80, 150), 'Operations': (20, 50)},
+        'source_ages': {'Marketing': (0.45, 1.0), 'IT': (0.02, 0.22), 'Finance': (0.05, 0.3), 'Operations': (0.07, 0.45)},
+    },
+    'uniform': {
+        'phishing_extra': 0.0,
+        'phishing_high_open': 0.0,
+        'incident_days': {},
+        'staff_days': {},
+        'waiting_backdate': 0.0,
+        'bob_open_share': 0.0,
+        'alice_open_moved': 0.0,
+        'source_weights': (0.25, 0.25, 0.25, 0.25),
+        'source_sizes': {},
+        'source_ages': {},
+    },
+}
+DEFAULT_INCIDENT_DAYS = (2, 5)
+DEFAULT_STAFF_DAYS = (3, 8)
+DEFAULT_SOURCE_SIZE = (20, 300)
+DEFAULT_SOURCE_AGE = (0.0, 1.0)
+
+
+def _ranges(keys, ranges, default):
+    """Per-row (low, high) arrays looked up from a {key: (low, high)} table"""
+    low = np.full(len(keys), default[0])
+    high = np.full(len(keys), default[1])
+    for key, (lo, hi) in ranges.items():
+        low[keys == key] = lo
+        high[keys == key] = hi
+    return low, high
+
+
+def _days_before(end, offsets):
+    """ISO date strings offsets days before end"""
+    return np.datetime_as_string(end - offsets.astype('timedelta64[D]'), unit='D')
+
+
+def _optional_days_after(start, days, present):
+    """ISO date strings days after start where present, None elsewhere"""
+    dates = np.datetime_as_string(start + days.astype('timedelta64[D]'), unit='D')
+    dates = dates.astype(object)
+    dates[~present] = None
+    return dates
+
+
+def generate_incidents(rng, n, profile, end, span):
+    """One batch of incident columns"""
+    types = rng.choice(INCIDENT_TYPES, n)
+    severity = rng.choice(SEVERITIES, n)
+    status = rng.choice(INCIDENT_STATUSES, n)
+    reported = _days_before(end, rng.integers(1, span + 1, n))
+
+    # More phishing, part of it high-severity and still open
+    types = np.where(rng.random(n) < profile['phishing_extra'], 'Phishing', types)
+    stuck = (types == 'Phishing') & (rng.random(n) < profile['phishing_high_open'])
+    severity = np.where(stuck, 'High', severity)
+    status = np.where(stuck, rng.choice(INCIDENT_STATUSES[:2], n), status)
+
+    low, high = _ranges(types, profile['incident_days'], DEFAULT_INCIDENT_DAYS)
+    resolved = _optional_days_after(reported.astype('datetime64[D]'),
+                                    rng.integers(low, high + 1), status == 'Resolved')
+    description = np.char.add(np.char.add('Sample ', types),
+                              np.char.add(np.char.add(' incident - ', severity), ' severity'))
+    return types, severity, status, reported, resolved, description
+
+
+def generate_tickets(rng, n, profile, end, span):
+    """One batch of ticket columns"""
+    title = rng.choice(TICKET_TITLES, n)
+    priority = rng.choice(PRIORITIES, n)
+    status = rng.choice(TICKET_STATUSES, n)
+    assigned = rng.choice(STAFF, n)
+    age = rng.integers(1, span + 1, n)
+
+    low, high = _ranges(assigned, profile['staff_days'], DEFAULT_STAFF_DAYS)
+    resolution = rng.integers(low, high + 1)
+
+    # Tickets waiting for the user stay open longer
+    waiting = (status == 'Waiting for User') & (rng.random(n) < profile['waiting_backdate'])
+    age = age + np.where(waiting, rng.integers(8, 16, n), 0)
+
+    # Open work piles up on Bob and drains away from Alice
+    still_open = np.isin(status, ['Open', 'In Progress'])
+    assigned = np.where(still_open & (rng.random(n) < profile['bob_open_share']), 'Bob Smith', assigned)
+    moved = still_open & (assigned == 'Alice Johnson') & (rng.random(n) < profile['alice_open_moved'])
+    assigned = np.where(moved, rng.choice(STAFF[1:], n), assigned)
+
+    created = _days_before(end, age)
+    resolved = _optional_days_after(created.astype('datetime64[D]'), resolution, status == 'Resolved')
+    description = np.char.add('User reported: ', title)
+    return title, priority, status, assigned, created, resolved, description
+
+
+def generate_datasets(rng, n, profile, end, span, first_number):
+    """One batch of dataset metadata columns; names are numbered from first_number"""
+    source = SOURCES[rng.choice(len(SOURCES), n, p=profile['source_weights'])]
+    low, high = _ranges(source, profile['source_sizes'], DEFAULT_SOURCE_SIZE)
+    size_mb = rng.uniform(low, high)
+    row_count = (size_mb * rng.uniform(1000, 5000, n)).astype(np.int64)
+    low, high = _ranges(source, profile['source_ages'], DEFAULT_SOURCE_AGE)
+    age = np.maximum(1, (rng.uniform(low, high) * span).astype(np.int64))
+    numbers = np.char.zfill(np.arange(first_number, first_number + n).astype(str), 7)
+    name = np.char.add(np.char.add(source, '_Dataset_'), numbers)
+    return name, source, size_mb, row_count, _days_before(end, age)
+
+
+TABLES = {
+    'cyber_incidents': (('incident_type', 'severity', 'status', 'reported_date', 'resolved_date', 'description'),
+                        generate_incidents),
+    'it_tickets': (('title', 'priority', 'status', 'assigned_to', 'created_date', 'resolved_date', 'description'),
+                   generate_tickets),
+    'datasets_metadata': (('dataset_name', 'source', 'size_mb', 'row_count', 'upload_date'),
+                          generate_datasets),
+}
+
+
+def load_table(conn, table, rows, rng, profile, end, span, batch_size):
+    """Generate and insert rows in batches, one transaction per batch; returns rows/s"""
+    columns, generate = TABLES[table]
+    insert = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+    started = time.perf_counter()
+    for start in range(0, rows, batch_size):
+        n = min(batch_size, rows - start)
+        extra = (start + 1,) if table == 'datasets_metadata' else ()
+        batch = generate(rng, n, profile, end, span, *extra)
+        conn.execute("BEGIN")
+        conn.executemany(insert, zip(*(column.tolist() for column in batch)))
+        conn.execute("COMMIT")
+        rate = (start + n) / (time.perf_counter() - started)
+        print(f"\r  {table}: {start + n:,}/{rows:,} ({rate:,.0f} rows/s)", end="", flush=True)
+    print()
+    return rows / (time.perf_counter() - started) if rows else 0.0
+
+
+def generate_database(db_path, incidents, tickets, datasets, seed=42, span=730, end=None,
+                      profile='problems', batch_size=DEFAULT_BATCH_SIZE):
+    """Create a new database of the given size
+
+    Rows are loaded into bare tables with journaling off. Indexes, summary
+    tables, rollups and search indexes are then built once by the
+    migrations, which is far cheaper than maintaining them row by row.
+    """
+    rng = np.random.default_rng(seed)
+    end = np.datetime64(end or 'today', 'D')
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -262144")
+    for statement in BASE_SCHEMA:
+        conn.execute(statement)
+    conn.executemany(
+        "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+        [(username, hash_password(password), role)
+         for username, password, role in DEMO_USERS]
+    )
+
+    settings = PROFILES[profile]
+    for table, rows in (('cyber_incidents', incidents), ('it_tickets', tickets), ('datasets_metadata', datasets)):
+        load_table(conn, table, rows, rng, settings, end, span, batch_size)
+
+    print("  Building indexes, summaries, rollups and search indexes...", end="", flush=True)
+    started = time.perf_counter()
+    configure_connection(conn, DEFAULT_STORAGE_MODE, 30)
+    apply_migrations(conn)
+    print(f" {time.perf_counter() - started:.1f}s")
+    conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic intelligence database for load testing")
+    parser.add_argument('--db', default="loadtest.db")
+    parser.add_argument('--incidents', type=int, default=1000000)
+    parser.add_argument('--tickets', type=int, default=1000000)
+    parser.add_argument('--datasets', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--days', type=int, default=730, help="date span the rows are spread over")
+    parser.add_argument('--end', help="last date of the span (YYYY-MM-DD, default today)")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='problems')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--force', action='store_true', help="replace the database file if it exists")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(args.db):
+        if not args.force:
+            parser.error(f"{args.db} exists; pass --force to replace it")
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+
+    started = time.perf_counter()
+    generate_database(args.db, args.incidents, args.tickets, args.datasets, args.seed,
+                      args.days, args.end, args.profile, args.batch_size)
+    size_mb = os.path.getsize(args.db) / 1024 ** 2
+    print(f"✅ {args.db}: {size_mb:,.1f} MB in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
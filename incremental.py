@@ -0,0 +1,109 @@
+import threading
+
+import pandas as pd
+
+from analytics import RunningGroupStats
+from migrations import ID_COLUMNS
+from schemas import concat_typed
+
+
+class IncrementalFrame:
+    """In-memory copy of a table refreshed by high-water-mark deltas
+
+    The first refresh loads the whole table. Later refreshes fetch only rows
+    above the last seen id plus rows the change log reports as updated or
+    deleted, replace those in the frame and fold the difference into the
+    running group statistics. Refresh cost follows the size of the change,
+    not the size of the table.
+    """
+
+    def __init__(self, db, table, derive=None, group_by=(), value=None):
+        self.db = db
+        self.table = table
+        self.id_col = ID_COLUMNS[table]
+        self.derive = derive
+        self.group_by = tuple(group_by)
+        self.value = value
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.frame = None
+        self.last_id = 0
+        self.last_change_id = 0
+        self.version = None
+        self.stats = {key: RunningGroupStats(key, self.value) for key in self.group_by}
+
+    def _prepare(self, rows):
+        rows = rows.set_index(self.id_col, drop=False)
+        if self.derive is not None:
+            rows = self.derive(rows)
+        return rows
+
+    def refresh(self):
+        """Apply everything that changed since the last refresh; returns the number of rows touched"""
+        with self._lock:
+            # Read before the delta, so the delta is never older than the version
+            version = self.db.get_data_version(self.table)
+            if self.frame is not None and version == self.version:
+                return 0
+            rows, touched_ids, change_id, complete = self.db.get_table_delta(
+                self.table, self.last_id, self.last_change_id
+            )
+            if not complete:
+                # The change log was pruned past our watermark: start over
+                self._reset()
+                rows, touched_ids, change_id, complete = self.db.get_table_delta(self.table)
+
+            rows = self._prepare(rows)
+            if self.frame is None:
+                self.frame = rows
+                for stats in self.stats.values():
+                    stats.add(rows)
+            else:
+                stale_ids = self.frame.index.intersection(pd.Index(touched_ids).union(rows.index))
+                if len(stale_ids):
+                    stale = self.frame.loc[stale_ids]
+                    for stats in self.stats.values():
+                        stats.remove(stale)
+                    self.frame = self.frame.drop(stale_ids)
+                if len(rows):
+                    for stats in self.stats.values():
+                        stats.add(rows)
+                    self.frame = concat_typed([self.frame, rows], self.table)
+
+            if len(rows):
+                self.last_id = max(self.last_id, int(rows.index.max()))
+            self.last_change_id = change_id
+            self.version = version
+            return len(rows) + len(touched_ids)
+
+    def snapshot(self):
+        """Copy of the current frame"""
+        with self._lock:
+            return self.frame.copy()
+
+    def group_stats(self, key):
+        """Running mean/count of the value column grouped by key"""
+        with self._lock:
+            return self.stats[key].result()
+
+
+_frames = {}
+_frames_lock = threading.Lock()
+
+
+def get_incremental_frame(db, table, derive=None, group_by=(), value=None):
+    """Return the process-wide incremental frame for a table, creating it once
+
+    One frame per database, role, table and grouping is shared by every
+    session, so each change is fetched once per process rather than once per
+    session, and each role holds only its own slice of the table.
+    """
+    key = (db.pool.db_path, db.role, table, tuple(group_by), value)
+    with _frames_lock:
+        frame = _frames.get(key)
+        if frame is None:
+            frame = IncrementalFrame(db, table, derive, group_by, value)
+            _frames[key] = frame
+    return frame
@@ -0,0 +1,230 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+DEFAULT_BATCH_SIZE = int(os.getenv('DB_IMPORT_BATCH_SIZE', '10000'))
+MAX_REPORTED_ERRORS = 20
+
+# Importable tables: columns in insert order, which of them must be present,
+# how to parse them, and the natural key a re-imported row is recognised by
+IMPORT_SPECS = {
+    'cyber_incidents': {
+        'columns': ('incident_type', 'severity', 'status', 'reported_date', 'resolved_date', 'description'),
+        'required': ('incident_type', 'severity', 'status', 'reported_date'),
+        'dates': ('reported_date', 'resolved_date'),
+        'numbers': (),
+        'natural_key': ('reported_date', 'incident_type', 'description'),
+    },
+    'it_tickets': {
+        'columns': ('title', 'priority', 'status', 'assigned_to', 'created_date', 'resolved_date', 'description'),
+        'required': ('title', 'priority', 'status', 'assigned_to', 'created_date'),
+        'dates': ('created_date', 'resolved_date'),
+        'numbers': (),
+        'natural_key': ('created_date', 'title', 'assigned_to'),
+    },
+    'datasets_metadata': {
+        'columns': ('dataset_name', 'source', 'size_mb', 'row_count', 'upload_date'),
+        'required': ('dataset_name', 'source', 'size_mb', 'row_count', 'upload_date'),
+        'dates': ('upload_date',),
+        'numbers': ('size_mb', 'row_count'),
+        'natural_key': ('dataset_name',),
+    },
+}
+
+TABLE_ALIASES = {'incidents': 'cyber_incidents', 'tickets': 'it_tickets', 'datasets': 'datasets_metadata'}
+
+
+class ImportReport:
+    """Running counts for one bulk import"""
+
+    def __init__(self, table):
+        self.table = table
+        self.read = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.errors = []
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.read / self.seconds if self.seconds else 0.0
+
+    def reject(self, rows, reason):
+        """Count rejected rows, keeping the first few (row number, reason) pairs"""
+        self.invalid += len(rows)
+        for row in rows[:max(0, MAX_REPORTED_ERRORS - len(self.errors))]:
+            self.errors.append((row, reason))
+
+    def __str__(self):
+        return (f"{self.table}: {self.read:,} read, {self.inserted:,} inserted, "
+                f"{self.duplicates:,} duplicates, {self.invalid:,} invalid "
+                f"in {self.seconds:.2f}s ({self.rows_per_second:,.0f} rows/s)")
+
+
+def _format_dates(parsed):
+    """ISO text as the app stores it: date only at midnight, date and time otherwise"""
+    has_time = parsed.notna() & (parsed != parsed.dt.normalize())
+    if not has_time.any():
+        return parsed.dt.strftime('%Y-%m-%d')
+    return parsed.dt.strftime('%Y-%m-%d').where(~has_time, parsed.dt.strftime('%Y-%m-%d %H:%M:%S'))
+
+
+def validate_chunk(chunk, table, report, first_row=0):
+    """Normalize one chunk of input rows and drop the invalid ones into the report
+
+    Returns the valid rows with exactly the table's import columns, dates as
+    ISO text and numbers parsed. Row numbers in the report are 1-based
+    positions in the input.
+    """
+    spec = IMPORT_SPECS[table]
+    missing = [col for col in spec['required'] if col not in chunk.columns]
+    if missing:
+        raise ValueError(f"{table} import is missing required columns: {', '.join(missing)}")
+
+    frame = chunk.reindex(columns=spec['columns'])
+    frame.index = pd.RangeIndex(first_row + 1, first_row + 1 + len(frame))
+    for col in spec['columns']:
+        if frame[col].dtype == object:
+            # Strip text, leave any non-text values as they are, blank means missing
+            stripped = frame[col].str.strip()
+            stripped = stripped.where(stripped.notna(), frame[col])
+            frame[col] = stripped.mask(stripped == '')
+
+    valid = pd.Series(True, index=frame.index)
+
+    def reject(mask, reason):
+        mask = mask & valid
+        if mask.any():
+            report.reject(mask[mask].index.tolist(), reason)
+            valid[mask] = False
+
+    for col in spec['required']:
+        reject(frame[col].isna(), f"missing {col}")
+    for col in spec['dates']:
+        parsed = pd.to_datetime(frame[col], errors='coerce', format='mixed')
+        reject(frame[col].notna() & parsed.isna(), f"unreadable {col}")
+        frame[col] = parsed
+    for col in spec['numbers']:
+        parsed = pd.to_numeric(frame[col], errors='coerce')
+        reject(frame[col].notna() & (parsed.isna() | (parsed < 0)), f"invalid {col}")
+        frame[col] = parsed
+    if 'resolved_date' in spec['dates']:
+        reject(frame['resolved_date'] < frame[spec['dates'][0]], "resolved before it was opened")
+    if 'row_count' in spec['numbers']:
+        reject(frame['row_count'] % 1 != 0, "row_count is not a whole number")
+
+    frame = frame[valid].copy()
+    for col in spec['dates']:
+        frame[col] = _format_dates(frame[col])
+    if 'row_count' in spec['numbers']:
+        frame['row_count'] = frame['row_count'].astype('int64')
+    return frame
+
+
+def insert_statement(table):
+    """INSERT that skips a row whose natural key is already in the table"""
+    spec = IMPORT_SPECS[table]
+    columns = spec['columns']
+    key_match = " AND ".join(f"{col} IS ?" for col in spec['natural_key'])
+    return (f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"SELECT {', '.join('?' for _ in columns)} "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {table} WHERE {key_match})")
+
+
+def bulk_insert(writer, table, chunks, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """Validate, deduplicate and insert chunks of rows through the serialized writer
+
+    chunks is a DataFrame or an iterable of DataFrames. Each batch of up to
+    batch_size valid rows is one executemany job, committed as one
+    transaction. Rows repeating a natural key already seen in this import
+    or already in the table are counted as duplicates, so re-running an
+    import is harmless. progress(report) is called after every batch.
+    """
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+    spec = IMPORT_SPECS[table]
+    key = list(spec['natural_key'])
+    query = insert_statement(table)
+    report = ImportReport(table)
+    seen = set()
+
+    for chunk in chunks:
+        rows = validate_chunk(chunk, table, report, report.read)
+        report.read += len(chunk)
+
+        # Python objects with None for missing values, as sqlite3 binds them
+        params = rows[list(spec['columns']) + key].astype(object)
+        params = params.where(params.notna(), None)
+
+        keys = list(params.iloc[:, len(spec['columns']):].itertuples(index=False, name=None))
+        fresh = []
+        for position, row_key in enumerate(keys):
+            if row_key not in seen:
+                seen.add(row_key)
+                fresh.append(position)
+        report.duplicates += len(keys) - len(fresh)
+        params = params.iloc[fresh]
+
+        for start in range(0, len(params), batch_size):
+            batch = list(params.iloc[start:start + batch_size].itertuples(index=False, name=None))
+            result = writer.execute(query, batch, many=True)
+            report.inserted += result.rowcount
+            report.duplicates += len(batch) - result.rowcount
+            report.seconds = time.perf_counter() - report.started
+            if progress:
+                progress(report)
+
+    report.seconds = time.perf_counter() - report.started
+    return report
+
+
+def read_file(path, chunksize=DEFAULT_BATCH_SIZE):
+    """Read a CSV, JSON Lines or Parquet export as an iterator of DataFrame chunks"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.csv', '.txt'):
+        return pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunksize)
+    if ext in ('.jsonl', '.ndjson', '.json'):
+        return pd.read_json(path, lines=True, dtype=False, chunksize=chunksize)
+    if ext in ('.parquet', '.pq'):
+        # Row groups are read one batch at a time
+        import pyarrow.parquet as pq
+        return (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize))
+    raise ValueError(f"Unsupported file type {ext!r}; expected .csv, .jsonl or .parquet")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import incidents, tickets or dataset metadata")
+    parser.add_argument('table', choices=sorted(TABLE_ALIASES) + sorted(IMPORT_SPECS))
+    parser.add_argument('path', help="CSV, JSON Lines or Parquet export")
+    parser.add_argument('--db', default="intelligence.db")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    from database import DatabaseManager
+    db = DatabaseManager(args.db)
+    table = TABLE_ALIASES.get(args.table, args.table)
+
+    def show(report):
+        print(f"\r  {report.read:,} read, {report.inserted:,} inserted, {report.duplicates:,} duplicates, "
+              f"{report.invalid:,} invalid ({report.rows_per_second:,.0f} rows/s)", end="", flush=True)
+
+    report = db.bulk_insert(table, read_file(args.path, args.batch_size), args.batch_size, show)
+    if not report.invalid:
+        print(f"\r✅ {report}")
+        return 0
+    print(f"\r⚠️ {report}")
+    print(f"  {report.invalid:,} rows rejected:")
+    for row, reason in report.errors:
+        print(f"  row {row}: {reason}")
+    if report.invalid > len(report.errors):
+        print(f"  ... and {report.invalid - len(report.errors):,} more invalid rows")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,437 @@
+import sqlite3
+import sys
+import threading
+
+# Primary key column of each dashboard table
+ID_COLUMNS = {
+    'cyber_incidents': 'incident_id',
+    'it_tickets': 'ticket_id',
+    'datasets_metadata': 'dataset_id',
+}
+BASE_TABLES = tuple(ID_COLUMNS)
+
+# Tables whose contents carry a version counter in table_versions
+VERSIONED_TABLES = BASE_TABLES + ('users',)
+
+# Base tables every migration builds on, created by the setup and data generator scripts
+BASE_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS users (
+        user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        role TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS cyber_incidents (
+        incident_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        incident_type TEXT NOT NULL,
+        severity TEXT NOT NULL,
+        status TEXT NOT NULL,
+        reported_date TEXT NOT NULL,
+        resolved_date TEXT,
+        description TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS datasets_metadata (
+        dataset_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        dataset_name TEXT NOT NULL,
+        source TEXT NOT NULL,
+        size_mb REAL NOT NULL,
+        row_count INTEGER NOT NULL,
+        upload_date TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS it_tickets (
+        ticket_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        priority TEXT NOT NULL,
+        status TEXT NOT NULL,
+        assigned_to TEXT NOT NULL,
+        created_date TEXT NOT NULL,
+        resolved_date TEXT,
+        description TEXT
+    )""",
+]
+
+
+def _change_log_triggers():
+    """Triggers recording every UPDATE and DELETE on the dashboard tables in row_changes"""
+    statements = []
+    for table, id_col in ID_COLUMNS.items():
+        for op in ('UPDATE', 'DELETE'):
+            statements.append(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_log_{op.lower()}
+                AFTER {op} ON {table}
+                BEGIN
+                    INSERT INTO row_changes (table_name, row_id, op) VALUES ('{table}', OLD.{id_col}, '{op[0]}');
+                END""")
+    return statements
+
+
+def days_between(start_col, end_col):
+    """SQL for the whole days between two date columns (pandas' .dt.days)"""
+    return f"CAST(julianday({end_col}) - julianday({start_col}) AS INTEGER)"
+
+
+# Trigger-maintained summary tables: source table -> (summary table, key columns,
+# measures as (column, SQL expression over one source row with {r} for NEW/OLD),
+# source columns whose change moves a row between groups or alters a measure)
+SUMMARY_TABLES = {
+    'cyber_incidents': ('kpi_incidents', ('incident_type', 'severity', 'status'), (
+        ('incident_count', "1"),
+        ('resolved_count', f"({days_between('{r}.reported_date', '{r}.resolved_date')}) IS NOT NULL"),
+        ('resolution_days_sum', f"COALESCE({days_between('{r}.reported_date', '{r}.resolved_date')}, 0)"),
+    ), ('incident_type', 'severity', 'status', 'reported_date', 'resolved_date')),
+    'it_tickets': ('kpi_tickets', ('assigned_to', 'priority', 'status'), (
+        ('ticket_count', "1"),
+        ('resolved_count', f"({days_between('{r}.created_date', '{r}.resolved_date')}) IS NOT NULL"),
+        ('resolution_days_sum', f"COALESCE({days_between('{r}.created_date', '{r}.resolved_date')}, 0)"),
+    ), ('assigned_to', 'priority', 'status', 'created_date', 'resolved_date')),
+    'datasets_metadata': ('kpi_datasets', ('source',), (
+        ('dataset_count', "1"),
+        ('size_mb_sum', "{r}.size_mb"),
+        ('row_count_sum', "{r}.row_count"),
+    ), ('source', 'size_mb', 'row_count')),
+}
+
+
+# Time-bucketed trend rollups: source table -> (rollup table, date column,
+# dimension columns, count column). Every row is counted once per grain.
+ROLLUP_GRAINS = {
+    'day': "date({col})",
+    'week': "date({col}, 'weekday 0', '-6 days')",
+    'month': "strftime('%Y-%m-01', {col})",
+}
+ROLLUP_TABLES = {
+    'cyber_incidents': ('incident_rollup', 'reported_date', ('incident_type', 'severity'), 'incident_count'),
+    'it_tickets': ('ticket_rollup', 'created_date', ('priority', 'assigned_to'), 'ticket_count'),
+}
+
+# FTS5 indexes over the free-text columns: source table -> (index table,
+# indexed columns). The index stores no copy of the text (external content)
+# and its rowid is the source row id.
+SEARCH_TABLES = {
+    'cyber_incidents': ('incidents_fts', ('description',)),
+    'it_tickets': ('tickets_fts', ('title', 'description')),
+    'datasets_metadata': ('datasets_fts', ('dataset_name',)),
+}
+
+
+def _upsert(summary, keys, measures, row, sign):
+    """INSERT ... ON CONFLICT adding (sign=1) or subtracting (sign=-1) one source row
+
+    keys and measures are (column, SQL expression) pairs where {r} in the
+    expression stands for the NEW or OLD row.
+    """
+    columns = ", ".join([name for name, _ in keys] + [name for name, _ in measures])
+    values = ", ".join([expr.format(r=row) for _, expr in keys] +
+                       [f"{sign} * ({expr.format(r=row)})" for _, expr in measures])
+    updates = ", ".join(f"{name} = {name} + excluded.{name}" for name, _ in measures)
+    return (f"INSERT INTO {summary} ({columns}) VALUES ({values}) "
+            f"ON CONFLICT ({', '.join(name for name, _ in keys)}) DO UPDATE SET {updates};")
+
+
+def _maintenance_triggers(table, name, watched, add_new, remove_old):
+    """AFTER INSERT/DELETE/UPDATE OF triggers running the given upserts"""
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_{name}_insert AFTER INSERT ON {table} "
+        f"BEGIN {add_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_{name}_delete AFTER DELETE ON {table} "
+        f"BEGIN {remove_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS trg_{table}_{name}_update AFTER UPDATE OF {', '.join(watched)} ON {table} "
+        f"BEGIN {remove_old} {add_new} END",
+    ]
+
+
+def summary_table_statements():
+    """CREATE TABLE and INSERT/UPDATE/DELETE triggers for every summary table"""
+    statements = []
+    for table, (summary, keys, measures, watched) in SUMMARY_TABLES.items():
+        key_defs = ", ".join(f"{key} TEXT NOT NULL" for key in keys)
+        measure_defs = ", ".join(f"{name} NUMERIC NOT NULL DEFAULT 0" for name, _ in measures)
+        statements.append(f"CREATE TABLE IF NOT EXISTS {summary} "
+                          f"({key_defs}, {measure_defs}, PRIMARY KEY ({', '.join(keys)}))")
+        key_exprs = [(key, f"{{r}}.{key}") for key in keys]
+        statements += _maintenance_triggers(
+            table, 'kpi', watched,
+            _upsert(summary, key_exprs, measures, 'NEW', 1),
+            _upsert(summary, key_exprs, measures, 'OLD', -1),
+        )
+    return statements
+
+
+def summary_rebuild_statements():
+    """Recompute every summary table from its source table"""
+    statements = []
+    for table, (summary, keys, measures, watched) in SUMMARY_TABLES.items():
+        columns = ", ".join(keys + tuple(name for name, _ in measures))
+        sums = ", ".join(f"TOTAL({expr.format(r=table)})" for _, expr in measures)
+        statements += [
+            f"DELETE FROM {summary}",
+            f"INSERT INTO {summary} ({columns}) "
+            f"SELECT {', '.join(keys)}, {sums} FROM {table} GROUP BY {', '.join(keys)}",
+        ]
+    return statements
+
+
+def _rollup_keys(date_col, dims, grain):
+    return ([('granularity', f"'{grain}'"),
+             ('bucket', ROLLUP_GRAINS[grain].format(col=f"{{r}}.{date_col}"))] +
+            [(dim, f"{{r}}.{dim}") for dim in dims])
+
+
+def rollup_table_statements():
+    """CREATE TABLE and maintenance triggers for the day/week/month rollups"""
+    statements = []
+    for table, (rollup, date_col, dims, count_col) in ROLLUP_TABLES.items():
+        dim_defs = "".join(f", {dim} TEXT NOT NULL" for dim in dims)
+        statements.append(
+            f"CREATE TABLE IF NOT EXISTS {rollup} (granularity TEXT NOT NULL, bucket TEXT NOT NULL{dim_defs}, "
+            f"{count_col} INTEGER NOT NULL DEFAULT 0, "
+            f"PRIMARY KEY (granularity, bucket, {', '.join(dims)}))"
+        )
+        measures = [(count_col, "1")]
+        add_new = " ".join(_upsert(rollup, _rollup_keys(date_col, dims, grain), measures, 'NEW', 1)
+                           for grain in ROLLUP_GRAINS)
+        remove_old = " ".join(_upsert(rollup, _rollup_keys(date_col, dims, grain), measures, 'OLD', -1)
+                              for grain in ROLLUP_GRAINS)
+        statements += _maintenance_triggers(table, 'rollup', (date_col,) + dims, add_new, remove_old)
+    return statements
+
+
+def rollup_rebuild_statements():
+    """Recompute every rollup from its source table"""
+    statements = []
+    for table, (rollup, date_col, dims, count_col) in ROLLUP_TABLES.items():
+        statements.append(f"DELETE FROM {rollup}")
+        for grain, bucket in ROLLUP_GRAINS.items():
+            bucket = bucket.format(col=date_col)
+            statements.append(
+                f"INSERT INTO {rollup} (granularity, bucket, {', '.join(dims)}, {count_col}) "
+                f"SELECT '{grain}', {bucket}, {', '.join(dims)}, COUNT(*) FROM {table} "
+                f"GROUP BY {bucket}, {', '.join(dims)}"
+            )
+    return statements
+
+
+def search_table_statements():
+    """CREATE VIRTUAL TABLE and sync triggers for every full-text index"""
+    statements = []
+    for table, (index, columns) in SEARCH_TABLES.items():
+        id_col = ID_COLUMNS[table]
+        column_list = ", ".join(columns)
+        statements.append(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5 ({column_list}, "
+            f"content='{table}', content_rowid='{id_col}', tokenize='unicode61 remove_diacritics 2')"
+        )
+        add_new = (f"INSERT INTO {index} (rowid, {column_list}) "
+                   f"VALUES (NEW.{id_col}, {', '.join(f'NEW.{col}' for col in columns)});")
+        remove_old = (f"INSERT INTO {index} ({index}, rowid, {column_list}) "
+                      f"VALUES ('delete', OLD.{id_col}, {', '.join(f'OLD.{col}' for col in columns)});")
+        statements += _maintenance_triggers(table, 'fts', columns, add_new, remove_old)
+    return statements
+
+
+def version_table_statements():
+    """table_versions and the triggers bumping a table's counter on every insert, update and delete
+
+    Counters start at the creation time in microseconds, so a database
+    rebuilt under the same path never repeats the versions of the old file.
+    """
+    statements = [
+        """CREATE TABLE IF NOT EXISTS table_versions (
+               table_name TEXT PRIMARY KEY,
+               version INTEGER NOT NULL
+           ) WITHOUT ROWID""",
+    ]
+    for table in VERSIONED_TABLES:
+        statements.append(
+            f"INSERT OR IGNORE INTO table_versions (table_name, version) "
+            f"VALUES ('{table}', CAST((julianday('now') - 2440587.5) * 86400000000 AS INTEGER))"
+        )
+        bump = f"UPDATE table_versions SET version = version + 1 WHERE table_name = '{table}';"
+        for op in ('INSERT', 'UPDATE', 'DELETE'):
+            statements.append(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{op.lower()} "
+                              f"AFTER {op} ON {table} BEGIN {bump} END")
+    return statements
+
+
+def search_rebuild_statements():
+    """Re-index every full-text index from its source table"""
+    return [f"INSERT INTO {index} ({index}) VALUES ('rebuild')" for index, _ in SEARCH_TABLES.values()]
+
+
+# Versioned schema changes applied on top of the tables created by
+# setup_database_with_problems.py. The applied version is tracked in
+# PRAGMA user_version; append new entries, never edit applied ones.
+MIGRATIONS = [
+    (1, "Secondary indexes for the dashboard filter columns", [
+        "CREATE INDEX IF NOT EXISTS idx_incidents_status_severity ON cyber_incidents (status, severity)",
+        "CREATE INDEX IF NOT EXISTS idx_incidents_severity_status ON cyber_incidents (severity, status)",
+        "CREATE INDEX IF NOT EXISTS idx_incidents_reported_date ON cyber_incidents (reported_date)",
+        "CREATE INDEX IF NOT EXISTS idx_tickets_assigned_status ON it_tickets (assigned_to, status)",
+        "CREATE INDEX IF NOT EXISTS idx_tickets_status_priority ON it_tickets (status, priority)",
+        "CREATE INDEX IF NOT EXISTS idx_tickets_created_date ON it_tickets (created_date)",
+        "CREATE INDEX IF NOT EXISTS idx_datasets_source ON datasets_metadata (source)",
+        "CREATE INDEX IF NOT EXISTS idx_datasets_upload_date ON datasets_metadata (upload_date)",
+    ]),
+    (2, "Change log of updated and deleted rows for incremental refresh", [
+        """CREATE TABLE IF NOT EXISTS row_changes (
+               change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+               table_name TEXT NOT NULL,
+               row_id INTEGER NOT NULL,
+               op TEXT NOT NULL
+           )""",
+        "CREATE INDEX IF NOT EXISTS idx_row_changes_table ON row_changes (table_name, change_id)",
+        *_change_log_triggers(),
+    ]),
+    (3, "KPI summary tables kept current by triggers", [
+        *summary_table_statements(),
+        *summary_rebuild_statements(),
+    ]),
+    (4, "Day/week/month trend rollups kept current by triggers", [
+        *rollup_table_statements(),
+        *rollup_rebuild_statements(),
+    ]),
+    (5, "Indexes serving keyset pagination of the catalog and critical incidents", [
+        "CREATE INDEX IF NOT EXISTS idx_datasets_size ON datasets_metadata (size_mb)",
+        "CREATE INDEX IF NOT EXISTS idx_datasets_row_count ON datasets_metadata (row_count)",
+        "CREATE INDEX IF NOT EXISTS idx_datasets_source_size ON datasets_metadata (source, size_mb)",
+        "CREATE INDEX IF NOT EXISTS idx_incidents_severity_reported ON cyber_incidents (severity, reported_date)",
+        # Covered by the two above; each extra index slows inserts and trigger writes
+        "DROP INDEX IF EXISTS idx_datasets_source",
+        "DROP INDEX IF EXISTS idx_incidents_severity_status",
+    ]),
+    (6, "FTS5 full-text indexes over dataset names and incident/ticket text", [
+        *search_table_statements(),
+        *search_rebuild_statements(),
+    ]),
+    (7, "Natural-key indexes for duplicate checks during bulk import", [
+        "CREATE INDEX IF NOT EXISTS idx_incidents_natural ON cyber_incidents (reported_date, incident_type, description)",
+        "CREATE INDEX IF NOT EXISTS idx_tickets_natural ON it_tickets (created_date, title, assigned_to)",
+        "CREATE INDEX IF NOT EXISTS idx_datasets_name ON datasets_metadata (dataset_name)",
+    ]),
+    (8, "Per-table version counters kept current by triggers", [
+        *version_table_statements(),
+    ]),
+]
+
+# Filter shapes issued by DatabaseManager and the dashboard pages, with sample parameters
+DASHBOARD_QUERIES = [
+    ("incidents by severity",
+     "SELECT * FROM cyber_incidents WHERE severity = ?", ('High',)),
+    ("unresolved incidents",
+     "SELECT * FROM cyber_incidents WHERE status < 'Resolved' OR status > 'Resolved'", ()),
+    ("critical incidents",
+     "SELECT * FROM cyber_incidents WHERE severity = 'High' AND status != 'Resolved' "
+     "ORDER BY reported_date DESC", ()),
+    ("incidents in date range",
+     "SELECT * FROM cyber_incidents WHERE reported_date BETWEEN ? AND ?", ('2024-01-01', '2024-12-31')),
+    ("tickets by status",
+     "SELECT * FROM it_tickets WHERE status = ?", ('Open',)),
+    ("tickets by assignee",
+     "SELECT * FROM it_tickets WHERE assigned_to = ?", ('Bob Smith',)),
+    ("tickets in date range",
+     "SELECT * FROM it_tickets WHERE created_date BETWEEN ? AND ?", ('2024-01-01', '2024-12-31')),
+    ("datasets by source",
+     "SELECT * FROM datasets_metadata WHERE source = ?", ('Marketing',)),
+    ("datasets in date range",
+     "SELECT * FROM datasets_metadata WHERE upload_date BETWEEN ? AND ?", ('2024-01-01', '2024-12-31')),
+]
+
+_migrated = set()
+_migrated_lock = threading.Lock()
+
+
+def get_schema_version(conn):
+    """Return the last migration version applied to the database"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _base_tables_exist(conn):
+    placeholders = ", ".join("?" for _ in BASE_TABLES)
+    query = f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ({placeholders})"
+    return conn.execute(query, BASE_TABLES).fetchone()[0] == len(BASE_TABLES)
+
+
+def apply_migrations(conn):
+    """Bring the schema up to the latest version; returns the versions applied
+
+    Each migration runs in its own BEGIN IMMEDIATE transaction and the version
+    is re-read inside it, so concurrent processes never apply one twice. A
+    database without the base tables yet (before setup has run) is left alone.
+    """
+    if not _base_tables_exist(conn):
+        return []
+
+    if conn.in_transaction:
+        conn.commit()
+
+    applied = []
+    for version, description, statements in MIGRATIONS:
+        if version <= get_schema_version(conn):
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version <= get_schema_version(conn):
+                conn.execute("ROLLBACK")
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        applied.append(version)
+
+    if applied:
+        conn.execute("PRAGMA optimize")
+    return applied
+
+
+def migrate_once(pool):
+    """Apply migrations the first time a pool's database is used in this process
+
+    A database is only marked done once it is at the latest version, so one
+    opened before setup created its tables is migrated on a later call.
+    """
+    with _migrated_lock:
+        if pool.db_path in _migrated:
+            return
+        with pool.connection() as conn:
+            apply_migrations(conn)
+            current = get_schema_version(conn) >= MIGRATIONS[-1][0]
+        if current:
+            _migrated.add(pool.db_path)
+
+
+def explain_dashboard_queries(conn):
+    """Run EXPLAIN QUERY PLAN over every dashboard query
+
+    Returns a list of (name, uses_index, plan) tuples where plan is the
+    joined plan detail text.
+    """
+    report = []
+    for name, query, params in DASHBOARD_QUERIES:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+        plan = "; ".join(row[-1] for row in rows)
+        scans_table = any(row[-1].startswith("SCAN") and "INDEX" not in row[-1] for row in rows)
+        uses_index = "INDEX" in plan and not scans_table
+        report.append((name, uses_index, plan))
+    return report
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "intelligence.db"
+    conn = sqlite3.connect(db_path)
+
+    applied = apply_migrations(conn)
+    print(f"Schema version {get_schema_version(conn)} "
+          f"({'applied ' + ', '.join(map(str, applied)) if applied else 'up to date'})")
+
+    print("\nQuery plans:")
+    missing = 0
+    for name, uses_index, plan in explain_dashboard_queries(conn):
+        print(f"  {'✅' if uses_index else '❌'} {name:<25} {plan}")
+        missing += not uses_index
+
+    conn.close()
+    sys.exit(1 if missing else 0)
@@ -1,64 +1,54 @@
 import streamlit as st
 import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
 import sys
 sys.path.append('..')
+from ai_advisor import PRIORITY_HIGH, PRIORITY_NORMAL, SchedulerBusy, ask, get_backend
+from ai_context import build_context
+from analytics import extremes
+from analytics.views import incident_resolution_view, incident_trend_view, incident_type_view
+from charts import time_series_figure
 from database import DatabaseManager
-import os
+from ui_components import GRANULARITY_TITLES, cached_chart, lazy_tabs, paginated_table, require_access, require_login, show_advice, trend_controls
 
 from dotenv import load_dotenv
 load_dotenv()
 
 st.set_page_config(page_title="Cybersecurity Dashboard", page_icon="🔐", layout="wide")
 
-# Check login
-if not st.session_state.get('logged_in', False):
-    st.warning("⚠️ Please login first")
-    st.stop()
+# Check login and that the role may see this dashboard
+username, role = require_login()
+require_access(role, 'cyber_incidents')
 
 st.title("🔐 Cybersecurity Dashboard")
 st.markdown("### Incident Response & Threat Analysis")
 
-# Initialize database
-db = DatabaseManager()
+# Initialize database for the role
+db = DatabaseManager(role=role)
 
-# Fetch all incidents
-df_incidents = db.get_all_incidents()
+# Fetch headline metrics
+kpis = db.get_incident_kpis()
 
-if df_incidents.empty:
+if kpis['total_incidents'] == 0:
     st.warning("No incident data available")
     st.stop()
 
-# Convert date columns if they exist
-if 'reported_date' in df_incidents.columns:
-    df_incidents['reported_date'] = pd.to_datetime(df_incidents['reported_date'])
-if 'resolved_date' in df_incidents.columns:
-    df_incidents['resolved_date'] = pd.to_datetime(df_incidents['resolved_date'])
-
-# Calculate resolution time if both dates exist
-if 'reported_date' in df_incidents.columns and 'resolved_date' in df_incidents.columns:
-    df_incidents['resolution_time_days'] = (
-        df_incidents['resolved_date'] - df_incidents['reported_date']
-    ).dt.days
-
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    total_incidents = len(df_incidents)
+    total_incidents = kpis['total_incidents']
     st.metric("Total Incidents", total_incidents)
 
 with col2:
-    unresolved = len(df_incidents[df_incidents['status'] != 'Resolved'])
+    unresolved = kpis['unresolved']
     st.metric("Unresolved", unresolved, delta=f"{unresolved} pending")
 
 with col3:
-    high_severity = len(df_incidents[df_incidents['severity'] == 'High'])
+    high_severity = kpis['high_severity']
     st.metric("High Severity", high_severity, delta="⚠️ Critical" if high_severity > 5 else "✓ Normal")
 
 with col4:
-    if 'resolution_time_days' in df_incidents.columns:
-        avg_resolution = df_incidents['resolution_time_days'].mean()
+    avg_resolution = kpis['avg_resolution_days']
+    if avg_resolution is not None:
         st.metric("Avg Resolution Time", f"{avg_resolution:.1f} days")
     else:
         st.metric("Avg Resolution Time", "N/A")
@@ -67,34 +57,50 @@ st.divider()
 
 st.subheader("🎯 Critical Insight: Phishing Incident Bottleneck Analysis")
 
-# Analysis tabs
-tab1, tab2, tab3 = st.tabs(["📊 Resolution Time Analysis", "📈 Incident Trends", "🚨 Critical Cases"])
+# Cache analyses per role and incidents table version
+incidents_version = (role, db.get_data_version('cyber_incidents'))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def resolution_analysis(version):
+    view = incident_resolution_view(db)
+    slowest, _ = extremes(view, 'Avg Days to Resolve')
+    return view, slowest
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def trend_analysis(version, start, end, granularity):
+    return incident_trend_view(db, start, end, granularity), incident_type_view(db)
+
 
-with tab1:
+# Analysis views
+views = ["📊 Resolution Time Analysis", "📈 Incident Trends", "🚨 Critical Cases", "🔍 Search"]
+view = lazy_tabs(views, key="incident_view")
+
+if view == views[0]:
     st.markdown("### Average Resolution Time by Incident Type")
     
-    if 'resolution_time_days' in df_incidents.columns and 'incident_type' in df_incidents.columns:
-        # Calculate average resolution time by incident type
-        resolution_by_type = df_incidents.groupby('incident_type')['resolution_time_days'].agg(['mean', 'count']).reset_index()
-        resolution_by_type.columns = ['Incident Type', 'Avg Days to Resolve', 'Count']
-        resolution_by_type = resolution_by_type.sort_values('Avg Days to Resolve', ascending=False)
-        
+    resolution_by_type, slowest_type = resolution_analysis(incidents_version)
+    
+    if slowest_type is not None:
         # Create bar chart
-        fig = px.bar(
-            resolution_by_type,
-            x='Incident Type',
-            y='Avg Days to Resolve',
-            color='Avg Days to Resolve',
-            color_continuous_scale='Reds',
-            title='Average Resolution Time by Threat Category',
-            text='Avg Days to Resolve'
-        )
-        fig.update_traces(texttemplate='%{text:.1f} days', textposition='outside')
-        fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        def resolution_chart():
+            fig = px.bar(
+                resolution_by_type,
+                x='Incident Type',
+                y='Avg Days to Resolve',
+                color='Avg Days to Resolve',
+                color_continuous_scale='Reds',
+                title='Average Resolution Time by Threat Category',
+                text='Avg Days to Resolve'
+            )
+            fig.update_traces(texttemplate='%{text:.1f} days', textposition='outside')
+            fig.update_layout(height=400)
+            return fig
+        
+        cached_chart("incident_resolution", incidents_version, resolution_chart)
         
         # Key Finding
-        slowest_type = resolution_by_type.iloc[0]
         st.warning(f"""
         **🔍 KEY FINDING:** {slowest_type['Incident Type']} incidents take the longest to resolve 
         ({slowest_type['Avg Days to Resolve']:.1f} days on average) with {int(slowest_type['Count'])} cases in the system.
@@ -106,63 +112,68 @@ with tab1:
     else:
         st.info("Resolution time data not available")
 
-with tab2:
+elif view == views[1]:
     st.markdown("### Incident Volume Over Time")
     
-    if 'reported_date' in df_incidents.columns:
-        # Time series of incidents
-        incidents_over_time = df_incidents.groupby(df_incidents['reported_date'].dt.date).size().reset_index()
-        incidents_over_time.columns = ['Date', 'Count']
-        
-        fig = px.line(
+    # Time series of incidents
+    first_day, last_day = db.get_trend_date_range('cyber_incidents')
+    start, end, granularity = trend_controls(first_day, last_day, key="incident_trend")
+    incidents_over_time, type_counts = trend_analysis(incidents_version, start, end, granularity)
+    
+    # Create line chart
+    def trend_chart():
+        fig = time_series_figure(
             incidents_over_time,
             x='Date',
             y='Count',
-            title='Daily Incident Reports',
+            title=f'{GRANULARITY_TITLES[granularity]} Incident Reports',
             markers=True
         )
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Breakdown by type
-        if 'incident_type' in df_incidents.columns:
-            st.markdown("### Incident Distribution by Type")
-            type_counts = df_incidents['incident_type'].value_counts().reset_index()
-            type_counts.columns = ['Incident Type', 'Count']
-            
-            fig = px.pie(
-                type_counts,
-                values='Count',
-                names='Incident Type',
-                title='Incident Type Distribution',
-                hole=0.4
-            )
-            fig.update_layout(height=400)
-            st.plotly_chart(fig, use_container_width=True)
+        return fig
+    
+    cached_chart(("incident_trend", start, end, granularity), incidents_version, trend_chart)
+    
+    # Breakdown by type
+    st.markdown("### Incident Distribution by Type")
+    
+    def type_chart():
+        fig = px.pie(
+            type_counts,
+            values='Count',
+            names='Incident Type',
+            title='Incident Type Distribution',
+            hole=0.4
+        )
+        fig.update_layout(height=400)
+        return fig
+    
+    cached_chart("incident_types", incidents_version, type_chart)
 
-with tab3:
+elif view == views[2]:
     st.markdown("### High-Severity Unresolved Incidents")
     
     # Filter high-severity unresolved incidents
-    critical_incidents = df_incidents[
-        (df_incidents['severity'] == 'High') & 
-        (df_incidents['status'] != 'Resolved')
-    ]
+    critical_count = db.count_critical_incidents()
     
-    if not critical_incidents.empty:
-        st.error(f"⚠️ {len(critical_incidents)} high-severity incidents require immediate attention!")
+    if critical_count:
+        st.error(f"⚠️ {critical_count} high-severity incidents require immediate attention!")
         
         # Display critical incidents
-        display_cols = ['incident_id', 'incident_type', 'severity', 'status', 'reported_date', 'description']
-        available_cols = [col for col in display_cols if col in critical_incidents.columns]
-        st.dataframe(
-            critical_incidents[available_cols].sort_values('reported_date', ascending=False),
-            use_container_width=True,
-            hide_index=True
-        )
+        paginated_table("critical", db.page_critical_incidents, total=critical_count)
     else:
         st.success("✅ No high-severity unresolved incidents")
 
+elif view == views[3]:
+    st.markdown("### Search Incidents")
+    
+    # Search titles and descriptions
+    incident_search = st.text_input("🔍 Search descriptions", placeholder="e.g. phishing", key="incident_search")
+    if incident_search:
+        matches = db.search_incidents(incident_search)
+        st.dataframe(matches, use_container_width=True, hide_index=True)
+        st.caption(f"{len(matches)} best matches")
+
 st.divider()
 
 
@@ -201,42 +212,27 @@ with st.expander("Get AI-Powered Security Insights"):
     if st.button("Get AI Advice"):
         if user_question:
             # Check for OpenAI API key
-            api_key = os.getenv('OPENAI_API_KEY')
-            if not api_key:
+            if get_backend() is None:
                 st.warning("""
                 ⚠️ OpenAI API key not configured. To enable AI features:
                 1. Set environment variable: `export OPENAI_API_KEY='your-key'`
                 2. Or create a `.env` file with: `OPENAI_API_KEY=your-key`
                 """)
             else:
+                # Prepare context from data
+                context = build_context(db, 'cybersecurity')
+                
+                # Open critical incidents raise the question's priority
+                priority = PRIORITY_HIGH if db.count_critical_incidents() else PRIORITY_NORMAL
+                # Ask the advisor
                 try:
-                    import openai
-                    openai.api_key = api_key
-                    
-                    # Prepare context from data
-                    context = f"""
-                    Current Cybersecurity Metrics:
-                    - Total Incidents: {total_incidents}
-                    - Unresolved: {unresolved}
-                    - High Severity: {high_severity}
-                    """
-                    
-                    # Call OpenAI API
-                    response = openai.ChatCompletion.create(
-                        model="gpt-3.5-turbo",
-                        messages=[
-                            {"role": "system", "content": "You are a cybersecurity expert advisor providing actionable insights."},
-                            {"role": "user", "content": f"{context}\n\nQuestion: {user_question}"}
-                        ]
-                    )
-                    
-                    st.success("AI Response:")
-                    st.write(response.choices[0].message.content)
-                    
-                except Exception as e:
-                    st.error(f"AI service error: {str(e)}")
+                    st.session_state.incident_advice = ask('cybersecurity', user_question, context, priority=priority)
+                except SchedulerBusy as e:
+                    st.warning(f"⏳ {e}")
         else:
             st.warning("Please enter a question")
+    
+    show_advice("incident_advice")
 
 
 with st.expander("➕ Add New Incident"):
@@ -1,82 +1,81 @@
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
-import pandas as pd
 import sys
 sys.path.append('..')
+from ai_advisor import SchedulerBusy, ask, get_backend
+from ai_context import build_context
+from analytics import largest_share
+from analytics.views import source_stats_view
 from database import DatabaseManager
-import os
+from ui_components import cached_chart, lazy_tabs, paginated_table, record_picker, require_access, require_login, show_advice
 
 from dotenv import load_dotenv
 load_dotenv()
 
 st.set_page_config(page_title="Data Science Dashboard", page_icon="📊", layout="wide")
 
-# Check login
-if not st.session_state.get('logged_in', False):
-    st.warning("⚠️ Please login first")
-    st.stop()
+# Check login and that the role may see this dashboard
+username, role = require_login()
+require_access(role, 'datasets_metadata')
 
 st.title("📊 Data Science Dashboard")
 st.markdown("### Dataset Catalog & Resource Management")
 
-# Initialize database
-db = DatabaseManager()
+# Initialize database for the role
+db = DatabaseManager(role=role)
 
-# Fetch all datasets
-df_datasets = db.get_all_datasets()
+# Fetch headline metrics
+kpis = db.get_dataset_kpis()
 
-if df_datasets.empty:
+if kpis['total_datasets'] == 0:
     st.warning("No dataset metadata available")
     st.stop()
 
-# Convert date columns if they exist
-if 'upload_date' in df_datasets.columns:
-    df_datasets['upload_date'] = pd.to_datetime(df_datasets['upload_date'])
-
 
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    total_datasets = len(df_datasets)
+    total_datasets = kpis['total_datasets']
     st.metric("Total Datasets", total_datasets)
 
 with col2:
-    if 'size_mb' in df_datasets.columns:
-        total_storage = df_datasets['size_mb'].sum()
-        st.metric("Total Storage", f"{total_storage:.1f} MB")
-    else:
-        st.metric("Total Storage", "N/A")
+    total_storage = kpis['total_storage_mb']
+    st.metric("Total Storage", f"{total_storage:.1f} MB")
 
 with col3:
-    if 'row_count' in df_datasets.columns:
-        total_rows = df_datasets['row_count'].sum()
-        st.metric("Total Records", f"{total_rows:,.0f}")
-    else:
-        st.metric("Total Records", "N/A")
+    total_rows = kpis['total_rows']
+    st.metric("Total Records", f"{total_rows:,.0f}")
 
 with col4:
-    if 'size_mb' in df_datasets.columns:
-        avg_size = df_datasets['size_mb'].mean()
-        st.metric("Avg Dataset Size", f"{avg_size:.1f} MB")
-    else:
-        st.metric("Avg Dataset Size", "N/A")
+    avg_size = kpis['avg_size_mb']
+    st.metric("Avg Dataset Size", f"{avg_size:.1f} MB")
 
 st.divider()
 
 st.subheader("🎯 Critical Insight: Resource Consumption & Governance Analysis")
 
-# Analysis tabs
-tab1, tab2, tab3 = st.tabs(["💾 Storage Analysis", "📈 Source Dependencies", "🗂️ Dataset Catalog"])
+# Per-source totals, cached per role and datasets table version
+datasets_version = (role, db.get_data_version('datasets_metadata'))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def storage_analysis(version):
+    source_stats = source_stats_view(db)
+    return source_stats, db.get_top_datasets(10), largest_share(source_stats, 'Source', 'Total Size (MB)')
+
 
-with tab1:
+# Analysis views
+views = ["💾 Storage Analysis", "📈 Source Dependencies", "🗂️ Dataset Catalog"]
+view = lazy_tabs(views, key="dataset_view")
+
+if view == views[0]:
     st.markdown("### Dataset Resource Consumption Analysis")
     
-    if 'size_mb' in df_datasets.columns and 'dataset_name' in df_datasets.columns:
-        # Top datasets by size
-        top_datasets = df_datasets.nlargest(10, 'size_mb')
-        
-        # Create bar chart
+    source_stats, top_datasets, (largest_source, largest_size, percentage) = storage_analysis(datasets_version)
+    
+    # Top datasets by size
+    def top_datasets_chart():
         fig = px.bar(
             top_datasets,
             x='dataset_name',
@@ -90,39 +89,33 @@ with tab1:
         fig.update_traces(texttemplate='%{text:.1f} MB', textposition='outside')
         fig.update_xaxes(tickangle=-45)
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Calculate storage distribution
-        if 'source' in df_datasets.columns:
-            storage_by_source = df_datasets.groupby('source')['size_mb'].sum().reset_index()
-            storage_by_source.columns = ['Source', 'Total Size (MB)']
-            storage_by_source = storage_by_source.sort_values('Total Size (MB)', ascending=False)
-            
-            # Key Finding
-            largest_source = storage_by_source.iloc[0]
-            total_storage_val = storage_by_source['Total Size (MB)'].sum()
-            percentage = (largest_source['Total Size (MB)'] / total_storage_val) * 100
-            
-            st.warning(f"""
-            **🔍 KEY FINDING:** The '{largest_source['Source']}' department consumes 
-            {largest_source['Total Size (MB)']:.1f} MB ({percentage:.1f}% of total storage).
-            Consider implementing data archiving policies for this department.
-            """)
-            
-            # Storage by source table
-            st.dataframe(storage_by_source, use_container_width=True, hide_index=True)
-    else:
-        st.info("Storage data not available")
-
-with tab2:
+        return fig
+    
+    cached_chart("top_datasets", datasets_version, top_datasets_chart)
+    
+    # Storage distribution
+    storage_by_source = source_stats[['Source', 'Total Size (MB)']]
+    
+    # Key Finding
+    st.warning(f"""
+    **🔍 KEY FINDING:** The '{largest_source}' department consumes 
+    {largest_size:.1f} MB ({percentage:.1f}% of total storage).
+    Consider implementing data archiving policies for this department.
+    """)
+    
+    # Storage by source table
+    st.dataframe(storage_by_source, use_container_width=True, hide_index=True)
+
+elif view == views[1]:
     st.markdown("### Data Source Dependencies")
     
-    if 'source' in df_datasets.columns:
-        # Dataset count by source
-        source_counts = df_datasets['source'].value_counts().reset_index()
-        source_counts.columns = ['Source', 'Dataset Count']
-        
-        # Pie chart
+    source_stats, _, _ = storage_analysis(datasets_version)
+    
+    # Dataset count by source
+    source_counts = source_stats[['Source', 'Dataset Count']].sort_values('Dataset Count', ascending=False)
+    
+    # Pie chart
+    def source_count_chart():
         fig = px.pie(
             source_counts,
             values='Dataset Count',
@@ -131,69 +124,66 @@ with tab2:
             hole=0.4
         )
         fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Combined analysis
-        if 'size_mb' in df_datasets.columns and 'row_count' in df_datasets.columns:
-            st.markdown("### Source Department Statistics")
-            
-            source_stats = df_datasets.groupby('source').agg({
-                'size_mb': 'sum',
-                'row_count': 'sum',
-                'dataset_name': 'count'
-            }).reset_index()
-            source_stats.columns = ['Source', 'Total Size (MB)', 'Total Rows', 'Dataset Count']
-            source_stats = source_stats.sort_values('Total Size (MB)', ascending=False)
-            
-            # Create grouped bar chart
-            fig = go.Figure()
-            fig.add_trace(go.Bar(
-                name='Storage (MB)',
-                x=source_stats['Source'],
-                y=source_stats['Total Size (MB)'],
-                marker_color='indianred'
-            ))
-            fig.add_trace(go.Bar(
-                name='Dataset Count',
-                x=source_stats['Source'],
-                y=source_stats['Dataset Count'],
-                marker_color='lightsalmon'
-            ))
-            fig.update_layout(
-                title='Resource Consumption by Source',
-                barmode='group',
-                height=400
-            )
-            st.plotly_chart(fig, use_container_width=True)
-            
-            st.dataframe(source_stats, use_container_width=True, hide_index=True)
-
-with tab3:
+        return fig
+    
+    cached_chart("source_counts", datasets_version, source_count_chart)
+    
+    # Combined analysis
+    st.markdown("### Source Department Statistics")
+    
+    # Create grouped bar chart
+    def source_resource_chart():
+        fig = go.Figure()
+        fig.add_trace(go.Bar(
+            name='Storage (MB)',
+            x=source_stats['Source'],
+            y=source_stats['Total Size (MB)'],
+            marker_color='indianred'
+        ))
+        fig.add_trace(go.Bar(
+            name='Dataset Count',
+            x=source_stats['Source'],
+            y=source_stats['Dataset Count'],
+            marker_color='lightsalmon'
+        ))
+        fig.update_layout(
+            title='Resource Consumption by Source',
+            barmode='group',
+            height=400
+        )
+        return fig
+    
+    cached_chart("source_resources", datasets_version, source_resource_chart)
+    
+    st.dataframe(source_stats, use_container_width=True, hide_index=True)
+
+elif view == views[2]:
     st.markdown("### Complete Dataset Catalog")
     
     # Add search and filter
     col1, col2 = st.columns(2)
     with col1:
-        search_term = st.text_input("🔍 Search datasets", placeholder="Enter dataset name...")
+        search_term = st.text_input("🔍 Search datasets", placeholder="Enter words from the dataset name...")
     with col2:
-        if 'source' in df_datasets.columns:
-            source_filter = st.multiselect("Filter by Source", options=df_datasets['source'].unique())
+        source_filter = st.multiselect("Filter by Source", options=db.get_dataset_sources())
     
-    # Apply filters
-    filtered_df = df_datasets.copy()
-    if search_term:
-        filtered_df = filtered_df[filtered_df['dataset_name'].str.contains(search_term, case=False, na=False)]
-    if source_filter:
-        filtered_df = filtered_df[filtered_df['source'].isin(source_filter)]
+    # Sort and page through the matching datasets
+    CATALOG_SORTS = {"Size": 'size_mb', "Rows": 'row_count', "Upload date": 'upload_date', "Name": 'dataset_name'}
+    col1, col2 = st.columns(2)
+    with col1:
+        sort_label = st.selectbox("Sort by", list(CATALOG_SORTS), key="catalog_sort")
+    with col2:
+        descending = st.radio("Order", ["Descending", "Ascending"], horizontal=True, key="catalog_order") == "Descending"
+    sort_by = CATALOG_SORTS[sort_label]
     
-    # Display filtered data
-    st.dataframe(
-        filtered_df.sort_values('size_mb', ascending=False) if 'size_mb' in filtered_df.columns else filtered_df,
-        use_container_width=True,
-        hide_index=True
+    paginated_table(
+        "catalog",
+        lambda after, page_size: db.page_datasets(
+            sort_by, descending, after, page_size, source_filter, search_term
+        ),
+        total=db.count_datasets(source_filter, search_term),
+        reset_on=(sort_by, descending, tuple(source_filter), search_term)
     )
-    
-    st.info(f"Showing {len(filtered_df)} of {len(df_datasets)} datasets")
 
 st.divider()
 
@@ -232,41 +222,25 @@ with st.expander("Get AI-Powered Data Management Insights"):
     
     if st.button("Get AI Advice"):
         if user_question:
-            api_key = os.getenv('OPENAI_API_KEY')
-            
-            if not api_key:
+            if get_backend() is None:
                 st.warning("""
                 ⚠️ OpenAI API key not configured. To enable AI features:
                 1. Set environment variable: `export OPENAI_API_KEY='your-key'`
                 2. Or create a `.env` file with: `OPENAI_API_KEY=your-key`
                 """)
             else:
+                # Prepare context from data
+                context = build_context(db, 'data_science')
+                
+                # Ask the advisor
                 try:
-                    import openai
-                    openai.api_key = api_key
-                    
-                    context = f"""
-                    Current Data Science Metrics:
-                    - Total Datasets: {total_datasets}
-                    - Total Storage: {total_storage:.1f} MB
-                    - Total Records: {total_rows:,.0f}
-                    """
-                    
-                    response = openai.ChatCompletion.create(
-                        model="gpt-3.5-turbo",
-                        messages=[
-                            {"role": "system", "content": "You are a data governance expert providing strategic insights."},
-                            {"role": "user", "content": f"{context}\n\nQuestion: {user_question}"}
-                        ]
-                    )
-                    
-                    st.success("AI Response:")
-                    st.write(response.choices[0].message.content)
-                    
-                except Exception as e:
-                    st.error(f"AI service error: {str(e)}")
+                    st.session_state.dataset_advice = ask('data_science', user_question, context)
+                except SchedulerBusy as e:
+                    st.warning(f"⏳ {e}")
         else:
             st.warning("Please enter a question")
+    
+    show_advice("dataset_advice")
 
 
 with st.expander("➕ Add New Dataset"):
@@ -286,13 +260,9 @@ with st.expander("➕ Add New Dataset"):
                 st.warning("Please provide a dataset name")
 
 with st.expander("🗑️ Delete Dataset"):
-    if 'dataset_id' in df_datasets.columns:
-        dataset_to_delete = st.selectbox(
-            "Select dataset to delete",
-            options=df_datasets['dataset_id'].tolist(),
-            format_func=lambda x: df_datasets[df_datasets['dataset_id']==x]['dataset_name'].values[0]
-        )
-        
+    # Pick a dataset by id or name
+    dataset_to_delete = record_picker("dataset", db.find_datasets, 'dataset_id', 'dataset_name', key="delete_dataset")
+    if dataset_to_delete is not None:
         if st.button("Delete Selected Dataset", type="primary"):
             db.delete_dataset(dataset_to_delete)
             st.success("Dataset deleted successfully!")
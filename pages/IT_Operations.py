@@ -1,106 +1,113 @@
 import streamlit as st
 import plotly.express as px
-import plotly.graph_objects as go
-import pandas as pd
 import sys
 sys.path.append('..')
+from ai_advisor import SchedulerBusy, ask, get_backend
+from ai_context import build_context
+from analytics import extremes
+from analytics.views import staff_performance_view, status_impact_view, ticket_trend_view
+from charts import time_series_figure
 from database import DatabaseManager
-import os
+from ui_components import GRANULARITY_TITLES, cached_chart, lazy_tabs, record_picker, require_access, require_login, show_advice, trend_controls
 
 from dotenv import load_dotenv
 load_dotenv()
 
 st.set_page_config(page_title="IT Operations Dashboard", page_icon="🛠️", layout="wide")
 
-# Check login
-if not st.session_state.get('logged_in', False):
-    st.warning("⚠️ Please login first")
-    st.stop()
+# Check login and that the role may see this dashboard
+username, role = require_login()
+require_access(role, 'it_tickets')
 
 st.title("🛠️ IT Operations Dashboard")
 st.markdown("### Service Desk Performance Monitoring")
 
-# Initialize database
-db = DatabaseManager()
+# Initialize database for the role
+db = DatabaseManager(role=role)
 
-# Fetch all tickets
-df_tickets = db.get_all_tickets()
+# Fetch headline metrics
+kpis = db.get_ticket_kpis()
 
-if df_tickets.empty:
+if kpis['total_tickets'] == 0:
     st.warning("No ticket data available")
     st.stop()
 
-# Convert date columns if they exist
-if 'created_date' in df_tickets.columns:
-    df_tickets['created_date'] = pd.to_datetime(df_tickets['created_date'])
-if 'resolved_date' in df_tickets.columns:
-    df_tickets['resolved_date'] = pd.to_datetime(df_tickets['resolved_date'])
-
-# Calculate resolution time
-if 'created_date' in df_tickets.columns and 'resolved_date' in df_tickets.columns:
-    df_tickets['resolution_time_days'] = (
-        df_tickets['resolved_date'] - df_tickets['created_date']
-    ).dt.days
-
 # ==================== KEY METRICS ====================
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    total_tickets = len(df_tickets)
+    total_tickets = kpis['total_tickets']
     st.metric("Total Tickets", total_tickets)
 
 with col2:
-    open_tickets = len(df_tickets[df_tickets['status'].isin(['Open', 'In Progress'])])
+    open_tickets = kpis['open_tickets']
     st.metric("Open/In Progress", open_tickets)
 
 with col3:
-    if 'priority' in df_tickets.columns:
-        high_priority = len(df_tickets[df_tickets['priority'] == 'High'])
-        st.metric("High Priority", high_priority)
+    high_priority = kpis['high_priority']
+    st.metric("High Priority", high_priority)
 
 with col4:
-    if 'resolution_time_days' in df_tickets.columns:
-        avg_resolution = df_tickets['resolution_time_days'].mean()
+    avg_resolution = kpis['avg_resolution_days']
+    if avg_resolution is not None:
         st.metric("Avg Resolution Time", f"{avg_resolution:.1f} days")
+    else:
+        st.metric("Avg Resolution Time", "N/A")
 
 st.divider()
 
 # ==================== HIGH-VALUE ANALYSIS ====================
 st.subheader("🎯 Critical Insight: Performance Bottleneck Analysis")
 
-tab1, tab2 = st.tabs(["👥 Staff Performance", "⏱️ Status Impact"])
+# Cache analyses per role and tickets table version
+tickets_version = (role, db.get_data_version('it_tickets'))
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def ticket_analysis(version):
+    staff_performance = staff_performance_view(db)
+    status_impact = status_impact_view(db)
+    slowest_staff, fastest_staff = extremes(staff_performance, 'Avg Resolution Days')
+    slowest_status, _ = extremes(status_impact, 'Avg Resolution Days')
+    return staff_performance, status_impact, slowest_staff, fastest_staff, slowest_status
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def trend_analysis(version, start, end, granularity):
+    return ticket_trend_view(db, start, end, granularity)
+
 
-with tab1:
+# Analysis views
+views = ["👥 Staff Performance", "⏱️ Status Impact", "📈 Ticket Trends", "🔍 Search"]
+view = lazy_tabs(views, key="ticket_view")
+
+if view == views[0]:
     st.markdown("### Resolution Time by Assigned Staff")
     
-    if 'resolution_time_days' in df_tickets.columns and 'assigned_to' in df_tickets.columns:
-        # Calculate average resolution time by staff
-        staff_performance = df_tickets.groupby('assigned_to').agg({
-            'resolution_time_days': 'mean',
-            'ticket_id': 'count'
-        }).reset_index()
-        staff_performance.columns = ['Staff Member', 'Avg Resolution Days', 'Ticket Count']
-        staff_performance = staff_performance.sort_values('Avg Resolution Days', ascending=False)
-        
+    # Average resolution time by staff
+    staff_performance, _, slowest_staff, fastest_staff, _ = ticket_analysis(tickets_version)
+    
+    if slowest_staff is not None:
         # Create bar chart
-        fig = px.bar(
-            staff_performance,
-            x='Staff Member',
-            y='Avg Resolution Days',
-            color='Avg Resolution Days',
-            color_continuous_scale='Reds',
-            title='Average Resolution Time by Staff Member',
-            text='Avg Resolution Days',
-            hover_data=['Ticket Count']
-        )
-        fig.update_traces(texttemplate='%{text:.1f} days', textposition='outside')
-        fig.update_xaxes(tickangle=-45)
-        fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        def staff_chart():
+            fig = px.bar(
+                staff_performance,
+                x='Staff Member',
+                y='Avg Resolution Days',
+                color='Avg Resolution Days',
+                color_continuous_scale='Reds',
+                title='Average Resolution Time by Staff Member',
+                text='Avg Resolution Days',
+                hover_data=['Ticket Count']
+            )
+            fig.update_traces(texttemplate='%{text:.1f} days', textposition='outside')
+            fig.update_xaxes(tickangle=-45)
+            fig.update_layout(height=400)
+            return fig
+        
+        cached_chart("staff_performance", tickets_version, staff_chart)
         
         # Key Finding
-        slowest_staff = staff_performance.iloc[0]
-        fastest_staff = staff_performance.iloc[-1]
         difference = slowest_staff['Avg Resolution Days'] - fastest_staff['Avg Resolution Days']
         
         st.warning(f"""
@@ -111,34 +118,31 @@ with tab1:
         
         st.dataframe(staff_performance, use_container_width=True, hide_index=True)
 
-with tab2:
+elif view == views[1]:
     st.markdown("### Impact of Ticket Status on Resolution Time")
     
-    if 'resolution_time_days' in df_tickets.columns and 'status' in df_tickets.columns:
-        # Calculate average resolution time by status
-        status_impact = df_tickets.groupby('status').agg({
-            'resolution_time_days': 'mean',
-            'ticket_id': 'count'
-        }).reset_index()
-        status_impact.columns = ['Status', 'Avg Resolution Days', 'Count']
-        status_impact = status_impact.sort_values('Avg Resolution Days', ascending=False)
-        
+    # Average resolution time by status
+    _, status_impact, _, _, slowest_status = ticket_analysis(tickets_version)
+    
+    if slowest_status is not None:
         # Create bar chart
-        fig = px.bar(
-            status_impact,
-            x='Status',
-            y='Avg Resolution Days',
-            color='Avg Resolution Days',
-            color_continuous_scale='Oranges',
-            title='Average Resolution Time by Status',
-            text='Avg Resolution Days'
-        )
-        fig.update_traces(texttemplate='%{text:.1f} days', textposition='outside')
-        fig.update_layout(height=400)
-        st.plotly_chart(fig, use_container_width=True)
+        def status_chart():
+            fig = px.bar(
+                status_impact,
+                x='Status',
+                y='Avg Resolution Days',
+                color='Avg Resolution Days',
+                color_continuous_scale='Oranges',
+                title='Average Resolution Time by Status',
+                text='Avg Resolution Days'
+            )
+            fig.update_traces(texttemplate='%{text:.1f} days', textposition='outside')
+            fig.update_layout(height=400)
+            return fig
+        
+        cached_chart("status_impact", tickets_version, status_chart)
         
         # Key Finding
-        slowest_status = status_impact.iloc[0]
         st.error(f"""
         **🔍 KEY FINDING:** Tickets in '{slowest_status['Status']}' status have the longest 
         resolution time ({slowest_status['Avg Resolution Days']:.1f} days on average). 
@@ -147,6 +151,39 @@ with tab2:
         
         st.dataframe(status_impact, use_container_width=True, hide_index=True)
 
+elif view == views[2]:
+    st.markdown("### Ticket Volume Over Time")
+    
+    # Tickets created over time
+    first_day, last_day = db.get_trend_date_range('it_tickets')
+    start, end, granularity = trend_controls(first_day, last_day, key="ticket_trend")
+    tickets_over_time = trend_analysis(tickets_version, start, end, granularity)
+    
+    # Create line chart
+    def trend_chart():
+        fig = time_series_figure(
+            tickets_over_time,
+            x='Date',
+            y='Tickets',
+            color='Priority',
+            title=f'{GRANULARITY_TITLES[granularity]} Tickets Created by Priority',
+            markers=True
+        )
+        fig.update_layout(height=400)
+        return fig
+    
+    cached_chart(("ticket_trend", start, end, granularity), tickets_version, trend_chart)
+
+elif view == views[3]:
+    st.markdown("### Search Tickets")
+    
+    # Search titles and descriptions
+    ticket_search = st.text_input("🔍 Search titles and descriptions", placeholder="e.g. password reset", key="ticket_search")
+    if ticket_search:
+        matches = db.search_tickets(ticket_search)
+        st.dataframe(matches, use_container_width=True, hide_index=True)
+        st.caption(f"{len(matches)} best matches")
+
 st.divider()
 
 # ==================== ACTIONABLE RECOMMENDATIONS ====================
@@ -185,37 +222,21 @@ with st.expander("Get AI-Powered IT Operations Insights"):
     
     if st.button("Get AI Advice"):
         if user_question:
-            api_key = os.getenv('OPENAI_API_KEY')
-            
-            if not api_key:
+            if get_backend() is None:
                 st.warning("⚠️ OpenAI API key not configured. Set OPENAI_API_KEY environment variable.")
             else:
+                # Prepare context from data
+                context = build_context(db, 'it_operations')
+                
+                # Ask the advisor
                 try:
-                    import openai
-                    openai.api_key = api_key
-                    
-                    context = f"""
-                    Current Metrics:
-                    - Total Tickets: {total_tickets}
-                    - Open: {open_tickets}
-                    - Avg Resolution: {avg_resolution:.1f} days
-                    """
-                    
-                    response = openai.ChatCompletion.create(
-                        model="gpt-3.5-turbo",
-                        messages=[
-                            {"role": "system", "content": "You are an IT operations expert."},
-                            {"role": "user", "content": f"{context}\n\n{user_question}"}
-                        ]
-                    )
-                    
-                    st.success("AI Response:")
-                    st.write(response.choices[0].message.content)
-                    
-                except Exception as e:
-                    st.error(f"AI service error: {str(e)}")
+                    st.session_state.ticket_advice = ask('it_operations', user_question, context)
+                except SchedulerBusy as e:
+                    st.warning(f"⏳ {e}")
         else:
             st.warning("Please enter a question")
+    
+    show_advice("ticket_advice")
 
 # ==================== CRUD OPERATIONS ====================
 with st.expander("➕ Add New Ticket"):
@@ -235,12 +256,9 @@ with st.expander("➕ Add New Ticket"):
                 st.warning("Please provide title and assignee")
 
 with st.expander("🔄 Update Ticket Status"):
-    if 'ticket_id' in df_tickets.columns:
-        ticket_to_update = st.selectbox(
-            "Select ticket",
-            options=df_tickets['ticket_id'].tolist(),
-            format_func=lambda x: df_tickets[df_tickets['ticket_id']==x]['title'].values[0]
-        )
+    # Pick a ticket by id or title
+    ticket_to_update = record_picker("ticket", db.find_tickets, 'ticket_id', 'title', key="update_ticket")
+    if ticket_to_update is not None:
         new_status = st.selectbox("New Status", ["Open", "In Progress", "Waiting for User", "Resolved"], key="update_status")
         
         if st.button("Update Status"):
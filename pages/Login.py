@@ -1,7 +1,7 @@
 import streamlit as st
-import bcrypt
 import sys
 sys.path.append('..')
+from auth_service import authenticate, issue_token, verify_token
 from database import DatabaseManager
 
 st.set_page_config(page_title="Login", page_icon="🔑")
@@ -12,7 +12,7 @@ st.title("🔑 Login")
 db = DatabaseManager()
 
 # login form
-if not st.session_state.get('logged_in', False):
+if verify_token(st.session_state.get('auth_token')) is None:
     with st.form("login_form"):
         st.subheader("Enter Your Credentials")
         username = st.text_input("Username")
@@ -22,27 +22,23 @@ if not st.session_state.get('logged_in', False):
         if submit:
             if username and password:
                 try:
-                    # Get user from database
-                    db.connect()
-                    query = "SELECT username, password_hash, role FROM users WHERE username = ?"
-                    result = db.cursor.execute(query, (username,)).fetchone()
-                    db.close()
+                    # Cached credential lookup; bcrypt runs on the bounded verification pool
+                    user = authenticate(db, username, password)
                     
-                    if result:
-                        stored_username, stored_hash, role = result
-                        
-                        # Verify password using bcrypt
-                        if bcrypt.checkpw(password.encode('utf-8'), stored_hash.encode('utf-8')):
-                            st.session_state.logged_in = True
-                            st.session_state.username = stored_username
-                            st.session_state.role = role
-                            st.success(f"Welcome {username}!")
-                            st.balloons()
-                            st.rerun()
-                        else:
-                            st.error("Invalid username or password")
+                    if user:
+                        stored_username, role = user
+                        st.session_state.logged_in = True
+                        st.session_state.username = stored_username
+                        st.session_state.role = role
+                        # Signed token lets every later rerun skip bcrypt and the database
+                        st.session_state.auth_token = issue_token(stored_username, role)
+                        st.success(f"Welcome {username}!")
+                        st.balloons()
+                        st.rerun()
                     else:
                         st.error("Invalid username or password")
+                except TimeoutError:
+                    st.warning("⏳ Many people are logging in right now. Please try again in a moment.")
                 except Exception as e:
                     st.error(f"Login error: {str(e)}")
                     st.info("Make sure the database is set up correctly.")
@@ -65,4 +61,5 @@ else:
         st.session_state.logged_in = False
         st.session_state.username = None
         st.session_state.role = None
+        st.session_state.auth_token = None
         st.rerun()
\ No newline at end of file
@@ -0,0 +1,167 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+DEFAULT_MAX_BYTES = int(float(os.getenv('QUERY_CACHE_MAX_MB', '256')) * 1024 * 1024)
+# Query results are keyed on table versions and never go stale, so entries
+# only expire when a TTL is configured explicitly
+DEFAULT_TTL = float(os.getenv('QUERY_CACHE_TTL', 'inf'))
+
+
+def estimate_size(value):
+    """Approximate memory footprint of a cached value in bytes"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sys.getsizeof(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def _copy(value):
+    """Hand out copies so one session cannot mutate another's cached frame"""
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+class ResultCache:
+    """Process-wide TTL cache with LRU eviction bounded by total bytes
+
+    Entries carry tags (table names for query results) so a write can drop
+    exactly the entries that depend on the table it touched. Concurrent
+    misses on the same key are collapsed: one caller computes while the
+    others wait for its result.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL, sizeof=estimate_size):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self._entries = OrderedDict()   # key -> (value, nbytes, expires_at, tags)
+        self._tagged = {}               # tag -> set of keys
+        self._generations = {}          # tag -> invalidation counter
+        self._inflight = {}             # key -> threading.Event
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _drop(self, key):
+        value, nbytes, expires_at, tags = self._entries.pop(key)
+        self.current_bytes -= nbytes
+        for tag in tags:
+            keys = self._tagged.get(tag)
+            if keys:
+                keys.discard(key)
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        if entry[2] < time.monotonic():
+            self._drop(key)
+            return False, None
+        self._entries.move_to_end(key)
+        return True, entry[0]
+
+    def get(self, key):
+        """Return (hit, value) for a key"""
+        with self._lock:
+            hit, value = self._lookup(key)
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return hit, _copy(value) if hit else None
+
+    def put(self, key, value, tags=(), ttl=None):
+        """Store a value, evicting least recently used entries to stay under max_bytes"""
+        nbytes = self.sizeof(value)
+        if nbytes > self.max_bytes:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._store(key, value, nbytes, expires_at, tuple(tags))
+
+    def _store(self, key, value, nbytes, expires_at, tags):
+        if key in self._entries:
+            self._drop(key)
+        while self._entries and self.current_bytes + nbytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+        self._entries[key] = (value, nbytes, expires_at, tags)
+        self.current_bytes += nbytes
+        for tag in tags:
+            self._tagged.setdefault(tag, set()).add(key)
+
+    def get_or_compute(self, key, compute, tags=(), ttl=None):
+        """Return the cached value for key, computing it at most once across threads"""
+        while True:
+            with self._lock:
+                hit, value = self._lookup(key)
+                if hit:
+                    self.hits += 1
+                    return _copy(value)
+                waiting_on = self._inflight.get(key)
+                if waiting_on is None:
+                    self.misses += 1
+                    done = threading.Event()
+                    self._inflight[key] = done
+                    generations = [self._generations.get(tag, 0) for tag in tags]
+                    break
+            # Another thread is computing this key; wait and look again
+            waiting_on.wait()
+
+        try:
+            value = compute()
+            nbytes = self.sizeof(value)
+            expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+            with self._lock:
+                # Skip storing if a write invalidated one of the tags meanwhile
+                fresh = generations == [self._generations.get(tag, 0) for tag in tags]
+                if fresh and nbytes <= self.max_bytes:
+                    self._store(key, value, nbytes, expires_at, tuple(tags))
+            return _copy(value)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            done.set()
+
+    def invalidate(self, tag):
+        """Drop every entry carrying a tag"""
+        with self._lock:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+            for key in list(self._tagged.pop(tag, ())):
+                if key in self._entries:
+                    self._drop(key)
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            for tag in self._tagged:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            self._entries.clear()
+            self._tagged.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Entry count, bytes used and hit/miss counters"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+# Shared by every DatabaseManager (and so every Streamlit session) in the process
+query_cache = ResultCache()
@@ -0,0 +1,57 @@
+import pandas as pd
+
+# Declared column types for each dashboard table. Frames returned by
+# DatabaseManager are converted at fetch time: dates parsed once, repeated
+# labels stored as category codes, integers downcast to the smallest dtype.
+# Floats are left as float64: float32 would change the sizes shown and summed.
+TABLE_SCHEMAS = {
+    'cyber_incidents': {
+        'dates': ('reported_date', 'resolved_date'),
+        'categories': ('incident_type', 'severity', 'status'),
+        'integers': ('incident_id',),
+        'floats': (),
+    },
+    'it_tickets': {
+        'dates': ('created_date', 'resolved_date'),
+        'categories': ('priority', 'status', 'assigned_to'),
+        'integers': ('ticket_id',),
+        'floats': (),
+    },
+    'datasets_metadata': {
+        'dates': ('upload_date',),
+        'categories': ('source',),
+        'integers': ('dataset_id', 'row_count'),
+        'floats': (),
+    },
+}
+
+
+def apply_schema(df, table):
+    """Convert the columns of a frame read from table to their declared dtypes
+
+    Columns the frame does not have are skipped, so column subsets and
+    filtered reads can be typed with the same schema.
+    """
+    schema = TABLE_SCHEMAS[table]
+    for col in schema['dates']:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], format='mixed')
+    for col in schema['categories']:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    for col in schema['integers']:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], downcast='integer')
+    for col in schema['floats']:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], downcast='float')
+    return df
+
+
+def concat_typed(frames, table):
+    """Concatenate typed frames, re-unifying categories that differ between them"""
+    combined = pd.concat(frames)
+    for col in TABLE_SCHEMAS[table]['categories']:
+        if col in combined.columns and not isinstance(combined[col].dtype, pd.CategoricalDtype):
+            combined[col] = combined[col].astype('category')
+    return combined
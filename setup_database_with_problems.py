@@ -1,7 +1,8 @@
 import sqlite3
-import bcrypt
 from datetime import datetime, timedelta
 import random
+from auth_service import hash_password
+from migrations import BASE_SCHEMA, apply_migrations
 
 # Connect to database
 conn = sqlite3.connect('intelligence.db')
@@ -14,50 +15,8 @@ print("="*60)
 
 print("\n[1/5] Creating tables...")
 
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS users (
-    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    username TEXT UNIQUE NOT NULL,
-    password_hash TEXT NOT NULL,
-    role TEXT NOT NULL
-)
-''')
-
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS cyber_incidents (
-    incident_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    incident_type TEXT NOT NULL,
-    severity TEXT NOT NULL,
-    status TEXT NOT NULL,
-    reported_date TEXT NOT NULL,
-    resolved_date TEXT,
-    description TEXT
-)
-''')
-
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS datasets_metadata (
-    dataset_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    dataset_name TEXT NOT NULL,
-    source TEXT NOT NULL,
-    size_mb REAL NOT NULL,
-    row_count INTEGER NOT NULL,
-    upload_date TEXT NOT NULL
-)
-''')
-
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS it_tickets (
-    ticket_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    title TEXT NOT NULL,
-    priority TEXT NOT NULL,
-    status TEXT NOT NULL,
-    assigned_to TEXT NOT NULL,
-    created_date TEXT NOT NULL,
-    resolved_date TEXT,
-    description TEXT
-)
-''')
+for statement in BASE_SCHEMA:
+    cursor.execute(statement)
 
 print("✅ Tables created!")
 
@@ -73,7 +32,7 @@ users = [
 ]
 
 for username, password, role in users:
-    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    password_hash = hash_password(password)
     try:
         cursor.execute(
             'INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)',
@@ -94,7 +53,8 @@ incident_types = ['Phishing', 'Malware', 'DDoS', 'Unauthorized Access', 'Data Br
 severities = ['Low', 'Medium', 'High']
 statuses = ['Open', 'In Progress', 'Resolved']
 
-# Create 100 incidents with PHISHING taking 5x longer
+# Create 100 incidents with PHISHING taking 5x longer, inserted in one executemany
+incident_rows = []
 for i in range(100):
     incident_type = random.choice(incident_types)
     severity = random.choice(severities)
@@ -126,14 +86,16 @@ for i in range(100):
     
     description = f"Sample {incident_type} incident - {severity} severity"
     
-    cursor.execute('''
-        INSERT INTO cyber_incidents 
-        (incident_type, severity, status, reported_date, resolved_date, description)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (incident_type, severity, status,
-          reported_date.strftime('%Y-%m-%d'),
-          resolved_date.strftime('%Y-%m-%d') if resolved_date else None,
-          description))
+    incident_rows.append((incident_type, severity, status,
+                          reported_date.strftime('%Y-%m-%d'),
+                          resolved_date.strftime('%Y-%m-%d') if resolved_date else None,
+                          description))
+
+cursor.executemany('''
+    INSERT INTO cyber_incidents 
+    (incident_type, severity, status, reported_date, resolved_date, description)
+    VALUES (?, ?, ?, ?, ?, ?)
+''', incident_rows)
 
 print("✅ Created 100 incidents with Phishing bottleneck (15 days avg vs 3 days)")
 
@@ -147,6 +109,7 @@ cursor.execute('DELETE FROM datasets_metadata')
 sources = ['Marketing', 'IT', 'Finance', 'Operations']
 dataset_count = {'Marketing': 9, 'IT': 4, 'Finance': 4, 'Operations': 3}
 
+dataset_rows = []
 dataset_id = 1
 for source, count in dataset_count.items():
     for i in range(count):
@@ -174,14 +137,16 @@ for source, count in dataset_count.items():
         row_count = int(size_mb * random.uniform(1000, 5000))
         upload_date = datetime.now() - timedelta(days=days_old)
         
-        cursor.execute('''
-            INSERT INTO datasets_metadata 
-            (dataset_name, source, size_mb, row_count, upload_date)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (dataset_name, source, size_mb, row_count, upload_date.strftime('%Y-%m-%d')))
+        dataset_rows.append((dataset_name, source, size_mb, row_count, upload_date.strftime('%Y-%m-%d')))
         
         dataset_id += 1
 
+cursor.executemany('''
+    INSERT INTO datasets_metadata 
+    (dataset_name, source, size_mb, row_count, upload_date)
+    VALUES (?, ?, ?, ?, ?)
+''', dataset_rows)
+
 print("✅ Created 20 datasets with Marketing consuming 61% of storage")
 
 # ==================== PROBLEM 3: BOB SMITH PERFORMANCE ISSUE ====================
@@ -203,6 +168,7 @@ ticket_titles = [
 ]
 
 # Create 100 tickets with specific problems
+ticket_rows = []
 for i in range(100):
     title = random.choice(ticket_titles)
     priority = random.choice(priorities)
@@ -245,14 +211,16 @@ for i in range(100):
     
     description = f"User reported: {title}"
     
-    cursor.execute('''
-        INSERT INTO it_tickets 
-        (title, priority, status, assigned_to, created_date, resolved_date, description)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (title, priority, status, assigned_to,
-          created_date.strftime('%Y-%m-%d'),
-          resolved_date.strftime('%Y-%m-%d') if resolved_date else None,
-          description))
+    ticket_rows.append((title, priority, status, assigned_to,
+                        created_date.strftime('%Y-%m-%d'),
+                        resolved_date.strftime('%Y-%m-%d') if resolved_date else None,
+                        description))
+
+cursor.executemany('''
+    INSERT INTO it_tickets 
+    (title, priority, status, assigned_to, created_date, resolved_date, description)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+''', ticket_rows)
 
 print("✅ Created 100 tickets with Bob Smith 3.3x slower + 'Waiting for User' bottleneck")
 
@@ -260,6 +228,11 @@ print("✅ Created 100 tickets with Bob Smith 3.3x slower + 'Waiting for User' b
 
 conn.commit()
 
+# Indexes and other schema upgrades on top of the base tables
+applied = apply_migrations(conn)
+if applied:
+    print(f"\n✅ Applied schema migrations: {', '.join(map(str, applied))}")
+
 print("\n" + "="*60)
 print("VERIFICATION - Checking Problems are Present")
 print("="*60)
@@ -0,0 +1,23 @@
+import pytest
+
+from analytics import add_resolution_days
+from database import DatabaseManager
+from generate_data import generate_database
+from incremental import IncrementalFrame
+
+
+@pytest.fixture
+def db(tmp_path):
+    """DatabaseManager over a small generated database, without the shared query cache"""
+    path = str(tmp_path / "test.db")
+    generate_database(path, 300, 300, 30, seed=7, end='2024-12-31')
+    manager = DatabaseManager(path, cache=None)
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def tickets(db):
+    """Private incremental ticket frame with resolution days and stats by assignee and status"""
+    return IncrementalFrame(db, 'it_tickets', lambda df: add_resolution_days(df, 'created_date'),
+                            ('assigned_to', 'status'), 'resolution_time_days')
@@ -0,0 +1,75 @@
+import json
+import importlib
+
+import pytest
+
+import access
+from database import DatabaseManager
+
+
+@pytest.fixture
+def scopes(monkeypatch):
+    """Replace ROLE_SCOPES for one test; role_views is rebuilt around it"""
+    def use(role_scopes):
+        monkeypatch.setattr(access, 'ROLE_SCOPES', role_scopes)
+        access.role_views.cache_clear()
+    yield use
+    access.role_views.cache_clear()
+
+
+def _reader(db, role):
+    return DatabaseManager(db.db_path, cache=None, role=role)
+
+
+def test_hidden_table_reads_empty(db):
+    reader = _reader(db, 'IT Operations')
+    try:
+        assert access.can_read('IT Operations', 'it_tickets')
+        assert not access.can_read('IT Operations', 'cyber_incidents')
+        assert reader.get_incident_kpis()['total_incidents'] == 0
+        assert reader.get_all_incidents().empty
+        assert reader.get_ticket_kpis()['total_tickets'] == db.get_ticket_kpis()['total_tickets']
+    finally:
+        reader.close()
+
+
+def test_filtered_slice(db, scopes):
+    scopes({'Desk': {'it_tickets': {'assigned_to': ['Bob Smith']}}})
+    reader = _reader(db, 'Desk')
+    try:
+        tickets = reader.get_all_tickets()
+        assert len(tickets) and set(tickets['assigned_to']) == {'Bob Smith'}
+        # Summary tables are sliced the same way as the table they summarize
+        assert reader.get_ticket_kpis()['total_tickets'] == len(tickets)
+        assert reader.get_staff_performance()['assigned_to'].tolist() == ['Bob Smith']
+    finally:
+        reader.close()
+
+
+def test_role_scopes_file(tmp_path, monkeypatch):
+    path = tmp_path / "scopes.json"
+    path.write_text(json.dumps({'Auditor': {'datasets_metadata': {'source': ['Finance']}}}))
+    monkeypatch.setenv('ROLE_SCOPES_FILE', str(path))
+    try:
+        importlib.reload(access)
+        assert access.can_read('Auditor', 'datasets_metadata')
+        assert not access.can_read('Admin', 'it_tickets')
+        assert "source IN ('Finance')" in access.role_views('Auditor')['datasets_metadata']
+    finally:
+        monkeypatch.delenv('ROLE_SCOPES_FILE')
+        importlib.reload(access)
+
+
+def test_filter_on_column_summary_lacks(scopes):
+    scopes({'Narrow': {'it_tickets': {'title': ['Printer offline']}}})
+    with pytest.raises(ValueError, match='title'):
+        access.role_views('Narrow')
+
+
+@pytest.mark.parametrize('name', ['main.it_tickets', 'main . "it_tickets"', 'temp.[it_tickets]'])
+def test_schema_qualified_names_are_rejected(name):
+    with pytest.raises(ValueError, match='schema-qualified'):
+        access.scope_query(f"SELECT COUNT(*) FROM {name}", 'IT Operations')
+    with pytest.raises(ValueError, match='schema-qualified'):
+        access.scope_query(f"SELECT COUNT(*) FROM {name.replace('it_tickets', 'cyber_incidents')}",
+                           'IT Operations')
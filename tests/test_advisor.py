@@ -0,0 +1,62 @@
+import pytest
+
+import ai_advisor
+from ai_advisor import StubBackend, ask
+from result_cache import ResultCache
+
+CONTEXT = """
+    IT operations metrics:
+    - Total tickets: 300
+"""
+
+
+@pytest.fixture(autouse=True)
+def response_cache(monkeypatch):
+    cache = ResultCache()
+    monkeypatch.setattr(ai_advisor, 'response_cache', cache)
+    return cache
+
+
+def test_stub_backend_from_settings(monkeypatch):
+    monkeypatch.setattr(ai_advisor, 'AI_BACKEND', 'stub')
+    monkeypatch.setattr(ai_advisor, '_backend', None)
+    assert isinstance(ai_advisor.get_backend(), StubBackend)
+
+    advice = ask('it_operations', 'Which queue is slowest?', CONTEXT)
+    assert advice.wait(5)
+    assert advice.error is None
+    assert advice.text.strip() == "Stub advice for: Which queue is slowest?"
+
+
+def test_repeated_question_is_served_from_cache():
+    backend = StubBackend(delay=0)
+    first = ask('cybersecurity', 'How do we cut phishing?', CONTEXT, backend=backend)
+    assert first.wait(5) and not first.cached
+
+    # Same question up to case, spacing and punctuation, same context up to indentation
+    again = ask('cybersecurity', '  how do we cut   PHISHING ', CONTEXT.replace('    ', ''), backend=backend)
+    assert again.done and again.cached
+    assert again.text == first.text
+    assert backend.calls == 1
+
+    other = ask('data_science', 'How do we cut phishing?', CONTEXT, backend=backend)
+    assert other.wait(5) and not other.cached
+    assert backend.calls == 2
+
+
+def test_slow_answer_times_out_and_is_not_cached(response_cache):
+    backend = StubBackend(reply="word " * 50, delay=0.05)
+    advice = ask('it_operations', 'Why so slow?', CONTEXT, backend=backend, timeout=0.3)
+
+    texts = list(advice.stream(poll=0.05))
+    assert isinstance(advice.error, TimeoutError)
+    assert texts[-1] and len(texts[-1].split()) < 50
+    assert response_cache.get(advice.key) == (False, None)
+
+
+def test_expired_deadline_never_reaches_backend():
+    backend = StubBackend(delay=0)
+    advice = ask('it_operations', 'Anything?', CONTEXT, backend=backend, timeout=0)
+    assert advice.wait(5)
+    assert isinstance(advice.error, TimeoutError)
+    assert backend.calls == 0
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import downsample, extremes, from_group_stats, largest_share, lttb, views
+
+
+def test_extremes_ignores_missing_values():
+    frame = pd.DataFrame({'name': ['a', 'b', 'c'], 'days': [2.0, np.nan, 5.0]})
+    largest, smallest = extremes(frame, 'days')
+    assert largest['name'] == 'c'
+    assert smallest['name'] == 'a'
+
+
+def test_extremes_without_values():
+    frame = pd.DataFrame({'name': ['a'], 'days': [np.nan]})
+    assert extremes(frame, 'days') == (None, None)
+
+
+def test_largest_share():
+    frame = pd.DataFrame({'source': ['x', 'y'], 'size': [75.0, 25.0]})
+    assert largest_share(frame, 'source', 'size') == ('x', 75.0, 75.0)
+
+
+def test_from_group_stats_ranks_slowest_first():
+    stats = pd.DataFrame({'status': ['Open', 'Closed'], 'mean': [1.0, 4.0], 'rows': [3, 2]})
+    view = from_group_stats(stats, 'status', {'status': 'Status', 'mean': 'Avg', 'rows': 'Count'})
+    assert list(view.columns) == ['Status', 'Avg', 'Count']
+    assert list(view['Status']) == ['Closed', 'Open']
+
+
+def test_lttb_keeps_ends_and_peak():
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[500] = 10
+    kept = lttb(x, y, 20)
+    assert len(kept) == 20
+    assert kept[0] == 0 and kept[-1] == 999
+    assert 500 in kept
+
+
+def test_downsample_per_series():
+    dates = pd.date_range('2024-01-01', periods=500)
+    frame = pd.concat([
+        pd.DataFrame({'date': dates, 'count': np.arange(500), 'kind': kind}) for kind in ('a', 'b')
+    ], ignore_index=True)
+    reduced = downsample(frame, 'date', 'count', 50, by='kind')
+    assert reduced.groupby('kind').size().tolist() == [50, 50]
+    assert downsample(frame, 'date', 'count', 500, by='kind') is frame
+
+
+def test_ticket_views_agree_with_sql(db, tickets):
+    """The incremental group stats and the SQL summary give the same figures"""
+    tickets.refresh()
+    stats = from_group_stats(tickets.group_stats('assigned_to'), 'assigned_to', {
+        'assigned_to': 'Staff Member', 'mean': 'Avg Resolution Days', 'rows': 'Ticket Count'
+    }).set_index('Staff Member')
+    view = views.staff_performance_view(db).set_index('Staff Member')
+
+    assert sorted(stats.index) == sorted(view.index)
+    assert stats['Ticket Count'].astype(int).to_dict() == view['Ticket Count'].to_dict()
+    assert stats['Avg Resolution Days'].to_dict() == pytest.approx(view['Avg Resolution Days'].to_dict())
@@ -0,0 +1,58 @@
+import base64
+import json
+import threading
+
+import pytest
+
+import auth_service
+from auth_service import authenticate, issue_token, verify_password, verify_token
+
+
+def test_authenticate(db):
+    assert authenticate(db, 'admin', 'admin123') == ('admin', 'Admin')
+    assert authenticate(db, 'admin', 'wrong') is None
+    assert authenticate(db, 'nobody', 'admin123') is None
+
+
+def test_token_round_trip():
+    assert verify_token(issue_token('it_support', 'IT Operations')) == ('it_support', 'IT Operations')
+
+
+def test_expired_token():
+    assert verify_token(issue_token('admin', 'Admin', hours=-1)) is None
+
+
+def test_tampered_token():
+    token = issue_token('it_support', 'IT Operations')
+    payload, signature = token.rsplit('.', 1)
+    claims = json.loads(base64.urlsafe_b64decode(payload))
+    claims['role'] = 'Admin'
+    forged = base64.urlsafe_b64encode(json.dumps(claims).encode('utf-8')).decode('ascii')
+
+    # Claiming another role breaks the signature
+    assert verify_token(f"{forged}.{signature}") is None
+    assert verify_token(token[:-1] + ('0' if token[-1] != '0' else '1')) is None
+    assert verify_token('not a token') is None
+    assert verify_token(None) is None
+
+
+def test_timed_out_check_keeps_its_slot(monkeypatch):
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_check(password, stored_hash):
+        started.set()
+        release.wait(5)
+        return True
+
+    monkeypatch.setattr(auth_service, '_check', slow_check)
+    monkeypatch.setattr(auth_service, '_pending', threading.BoundedSemaphore(1))
+    with pytest.raises(TimeoutError):
+        verify_password('pw', 'hash', timeout=0.05)
+    started.wait(5)
+
+    # The check is still running on the pool, so the only slot is still taken
+    with pytest.raises(TimeoutError, match='Too many logins'):
+        verify_password('pw', 'hash', timeout=0.05)
+    release.set()
+    assert auth_service._pending.acquire(timeout=5)
@@ -0,0 +1,15 @@
+import pandas as pd
+
+
+def test_filtered_iteration_streams_in_id_order(db):
+    """A filtered walk yields bounded chunks that together match a single query"""
+    chunks = list(db.iter_tickets(chunksize=7, columns=['priority', 'status'],
+                                  where="priority = ?", params=('High',)))
+    assert all(len(chunk) <= 7 for chunk in chunks)
+    assert all(list(chunk.columns) == ['priority', 'status'] for chunk in chunks)
+
+    walked = pd.concat(chunks, ignore_index=True)
+    expected = db.get_all_tickets()
+    expected = expected[expected['priority'] == 'High'].sort_values('ticket_id')
+    assert len(walked) == len(expected)
+    assert walked['status'].tolist() == expected['status'].tolist()
@@ -0,0 +1,70 @@
+import sqlite3
+
+from write_queue import WriteQueue
+
+
+def _change_log_size(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM row_changes").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_refresh_applies_updates_incrementally(db, tickets):
+    tickets.refresh()
+    db.update_ticket_status(1, 'Resolved')
+
+    # The updated row is re-read and reported as touched; nothing else is fetched
+    assert tickets.refresh() == 2
+    assert tickets.snapshot().loc[1, 'status'] == 'Resolved'
+
+
+def test_delta_reads_new_and_changed_rows(db):
+    rows, touched_ids, change_id, complete = db.get_table_delta('it_tickets')
+    last_id = int(rows['ticket_id'].max())
+    db.update_ticket_status(last_id, 'Closed')
+    db.update_ticket_status(2, 'Closed')
+
+    # A first load needs no change log lookup
+    assert complete and touched_ids == []
+    rows, touched_ids, _, complete = db.get_table_delta('it_tickets', last_id - 1, change_id)
+    assert complete and sorted(touched_ids) == [2, last_id]
+    assert rows['ticket_id'].tolist() == [2, last_id]
+    assert (rows['status'] == 'Closed').all()
+
+
+def test_pruned_window_forces_full_reload(db, tickets):
+    tickets.refresh()
+    for ticket_id in (1, 2, 3):
+        db.update_ticket_status(ticket_id, 'Closed')
+    db.prune_row_changes(keep=1)
+
+    calls = []
+    get_table_delta = db.get_table_delta
+
+    def recording_delta(table, after_id=0, after_change_id=0):
+        result = get_table_delta(table, after_id, after_change_id)
+        calls.append((after_id, after_change_id, result[3]))
+        return result
+
+    db.get_table_delta = recording_delta
+    tickets.refresh()
+
+    # The watermark fell out of the log, so the frame was reloaded from scratch
+    assert [complete for _, _, complete in calls] == [False, True]
+    assert calls[-1][:2] == (0, 0)
+    assert len(tickets.snapshot()) == len(db.get_all_tickets())
+    assert (tickets.snapshot().loc[[1, 2, 3], 'status'] == 'Closed').all()
+
+
+def test_writer_prunes_change_log(db):
+    writer = WriteQueue(db.db_path, change_log_keep=2, prune_every=3)
+    try:
+        for ticket_id in range(1, 10):
+            writer.execute("UPDATE it_tickets SET status = 'Closed' WHERE ticket_id = ?", (ticket_id,))
+    finally:
+        writer.close()
+
+    # Trimmed to 2 entries after the 3rd, 6th and 9th commits
+    assert _change_log_size(db.db_path) == 2
@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+from ingest import ImportReport, validate_chunk
+
+
+def _incidents(**overrides):
+    row = {'incident_type': 'Phishing', 'severity': 'High', 'status': 'Open',
+           'reported_date': '2024-03-01', 'resolved_date': '', 'description': 'Spoofed invoice'}
+    row.update(overrides)
+    return row
+
+
+def _tickets(count, title='Printer offline'):
+    return pd.DataFrame({
+        'title': [f"{title} {i}" for i in range(count)],
+        'priority': 'Low', 'status': 'Open', 'assigned_to': 'IT_Support_A',
+        'created_date': '2024-03-01', 'resolved_date': None, 'description': 'Imported',
+    })
+
+
+def test_validate_chunk_rejects_bad_rows():
+    chunk = pd.DataFrame([
+        _incidents(),
+        _incidents(severity=' '),
+        _incidents(reported_date='not a date'),
+        _incidents(resolved_date='2024-02-01'),
+    ])
+    report = ImportReport('cyber_incidents')
+    valid = validate_chunk(chunk, 'cyber_incidents', report, first_row=10)
+
+    assert valid.index.tolist() == [11]
+    assert valid.loc[11, 'reported_date'] == '2024-03-01'
+    assert report.invalid == 3
+    assert report.errors == [(12, 'missing severity'), (13, 'unreadable reported_date'),
+                             (14, 'resolved before it was opened')]
+
+
+def test_validate_chunk_needs_required_columns():
+    chunk = pd.DataFrame([_incidents()]).drop(columns='status')
+    with pytest.raises(ValueError, match='status'):
+        validate_chunk(chunk, 'cyber_incidents', ImportReport('cyber_incidents'))
+
+
+def test_duplicates_within_an_import(db):
+    before = len(db.get_all_tickets())
+    rows = pd.concat([_tickets(5), _tickets(5)], ignore_index=True)
+    report = db.bulk_insert_tickets(rows, batch_size=3)
+
+    assert (report.read, report.inserted, report.duplicates) == (10, 5, 5)
+    assert len(db.get_all_tickets()) == before + 5
+
+
+def test_reimport_is_harmless(db):
+    db.bulk_insert_tickets(_tickets(4))
+    before = len(db.get_all_tickets())
+    report = db.bulk_insert_tickets([_tickets(2), _tickets(4, title='Laptop slow')])
+
+    assert (report.read, report.inserted, report.duplicates) == (6, 4, 2)
+    assert len(db.get_all_tickets()) == before + 4
@@ -0,0 +1,84 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import result_cache
+from database import DatabaseManager
+from result_cache import ResultCache
+
+
+def test_lru_eviction_by_bytes():
+    cache = ResultCache(max_bytes=10, sizeof=len)
+    cache.put('a', 'xxxx')
+    cache.put('b', 'xxxx')
+    cache.get('a')
+    cache.put('c', 'xxxx')
+
+    # 'b' was least recently used and its 4 bytes make room for 'c'
+    assert cache.get('b') == (False, None)
+    assert cache.get('a') == (True, 'xxxx')
+    assert cache.stats()['bytes'] == 8
+
+    cache.put('huge', 'x' * 11)
+    assert cache.get('huge') == (False, None)
+    assert cache.stats()['entries'] == 2
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(result_cache, 'time', SimpleNamespace(monotonic=lambda: now[0]))
+    cache = ResultCache(ttl=30)
+    cache.put('default', 1)
+    cache.put('short', 2, ttl=5)
+
+    now[0] += 10
+    assert cache.get('short') == (False, None)
+    assert cache.get('default') == (True, 1)
+    now[0] += 30
+    assert cache.get('default') == (False, None)
+    assert cache.stats()['bytes'] == 0
+
+
+def test_write_invalidates_only_its_table(db):
+    cache = ResultCache()
+    manager = DatabaseManager(db.db_path, cache=cache)
+    try:
+        manager.get_incident_kpis()
+        manager.get_ticket_kpis()
+        entries = cache.stats()['entries']
+        manager.update_ticket_status(1, 'Closed')
+
+        # Only the ticket result was dropped; the incident one is still served
+        assert cache.stats()['entries'] == entries - 1
+        hits, misses = cache.hits, cache.misses
+        manager.get_incident_kpis()
+        manager.get_ticket_kpis()
+        assert (cache.hits, cache.misses) == (hits + 1, misses + 1)
+    finally:
+        manager.close()
+
+
+def test_concurrent_misses_compute_once():
+    cache = ResultCache()
+    calls = []
+    start = threading.Barrier(8)
+    results = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {'total': 42}
+
+    def worker():
+        start.wait()
+        results.append(cache.get_or_compute('kpis', compute))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{'total': 42}] * 8
+    assert cache.stats()['misses'] == 1
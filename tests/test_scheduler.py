@@ -0,0 +1,127 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import ai_scheduler
+from ai_scheduler import PRIORITY_HIGH, PRIORITY_NORMAL, RateLimited, RequestScheduler, SchedulerBusy, TokenBucket
+
+
+class StubBucket:
+    """Token bucket handing out tokens only when the test gives them"""
+
+    rate = 1.0
+
+    def __init__(self):
+        self.tokens = threading.Semaphore(0)
+        self.pauses = []
+
+    def try_acquire(self):
+        self.tokens.acquire()
+        return 0.0
+
+    def pause(self, seconds):
+        self.pauses.append(seconds)
+
+    def give(self, count=1):
+        for _ in range(count):
+            self.tokens.release()
+
+
+def _scheduler(**options):
+    scheduler = RequestScheduler(**options)
+    scheduler.bucket = StubBucket()
+    return scheduler
+
+
+def _job(log, name, finished):
+    def run(handle):
+        log.append(name)
+        handle.done = True
+        finished.release()
+    return run
+
+
+def _wait(finished, count):
+    for _ in range(count):
+        assert finished.acquire(timeout=5)
+
+
+def test_duplicate_requests_share_one_job():
+    scheduler = _scheduler(workers=1)
+    log, finished = [], threading.Semaphore(0)
+    first = SimpleNamespace(done=False)
+    assert scheduler.submit('q', first, _job(log, 'first', finished)) is first
+    assert scheduler.submit('q', SimpleNamespace(done=False), _job(log, 'second', finished)) is first
+
+    scheduler.bucket.give()
+    _wait(finished, 1)
+    assert log == ['first']
+    assert scheduler.stats()['coalesced'] == 1
+
+
+def test_high_priority_starts_first():
+    scheduler = _scheduler(workers=1)
+    log, finished = [], threading.Semaphore(0)
+    for name, priority in [('normal 1', PRIORITY_NORMAL),
+                           ('normal 2', PRIORITY_NORMAL),
+                           ('high', PRIORITY_HIGH)]:
+        scheduler.submit(name, SimpleNamespace(done=False), _job(log, name, finished), priority)
+    assert scheduler.position('high') == (0, 1.0)
+
+    scheduler.bucket.give(3)
+    _wait(finished, 3)
+    assert log == ['high', 'normal 1', 'normal 2']
+
+
+def test_full_queue_turns_requests_away():
+    scheduler = _scheduler(workers=1, max_pending=4)
+    run = _job([], 'job', threading.Semaphore(0))
+    for i in range(3):
+        scheduler.submit(f"normal {i}", SimpleNamespace(done=False), run)
+
+    # The last quarter of the queue is kept for high-priority requests
+    with pytest.raises(SchedulerBusy) as busy:
+        scheduler.submit('normal 3', SimpleNamespace(done=False), run)
+    assert busy.value.retry_after == 4.0
+    scheduler.submit('high 0', SimpleNamespace(done=False), run, PRIORITY_HIGH)
+    with pytest.raises(SchedulerBusy):
+        scheduler.submit('high 1', SimpleNamespace(done=False), run, PRIORITY_HIGH)
+    assert scheduler.stats()['rejected'] == 2
+
+
+def test_rate_limited_job_is_retried():
+    scheduler = _scheduler(workers=1)
+    attempts, finished = [], threading.Semaphore(0)
+
+    def run(handle):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RateLimited(2.5)
+        handle.done = True
+        finished.release()
+
+    scheduler.submit('q', SimpleNamespace(done=False), run)
+    scheduler.bucket.give(2)
+    _wait(finished, 1)
+    assert len(attempts) == 2
+    assert scheduler.bucket.pauses == [2.5]
+    assert scheduler.stats()['retried'] == 1
+
+
+def test_token_bucket_refills_and_pauses(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(ai_scheduler, 'time', SimpleNamespace(monotonic=lambda: now[0], sleep=time.sleep))
+    bucket = TokenBucket(rate=2.0, burst=2)
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == 0.0
+    assert bucket.try_acquire() == pytest.approx(0.5)
+
+    now[0] += 0.5
+    assert bucket.try_acquire() == 0.0
+    bucket.pause(3.0)
+    assert bucket.try_acquire() == pytest.approx(3.0)
+    now[0] += 3.0
+    # Starts empty after a pause
+    assert bucket.try_acquire() == pytest.approx(0.5)
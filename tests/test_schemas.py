@@ -0,0 +1,9 @@
+import pytest
+
+
+def test_dataset_sizes_sum_like_sql(db):
+    """Typed frames keep size_mb at full precision, so chunk sums match the SQL total"""
+    frame = db.get_all_datasets()
+    assert frame['size_mb'].dtype == 'float64'
+    chunked = sum(chunk['size_mb'].sum() for chunk in db.iter_datasets(chunksize=7))
+    assert chunked == pytest.approx(db.get_dataset_kpis()['total_storage_mb'], rel=1e-12)
@@ -0,0 +1,167 @@
+import streamlit as st
+
+from access import can_read
+from ai_advisor import queue_status
+from auth_service import verify_token
+from database import choose_granularity
+
+def require_login():
+    """(username, role) of the signed-in session; stops the page with a warning otherwise
+
+    Checks the signature and expiry of the session token set at login, so
+    reruns never touch bcrypt or the users table.
+    """
+    user = verify_token(st.session_state.get('auth_token'))
+    if user is None:
+        st.session_state.logged_in = False
+        st.warning("⚠️ Please login first")
+        st.stop()
+    return user
+
+
+def require_access(role, table):
+    """Stop the page with an error when the role may not read its table"""
+    if not can_read(role, table):
+        st.error(f"🔒 The {role} role does not have access to this dashboard")
+        st.stop()
+
+
+GRANULARITY_OPTIONS = {"Auto": None, "Daily": 'day', "Weekly": 'week', "Monthly": 'month'}
+GRANULARITY_TITLES = {'day': "Daily", 'week': "Weekly", 'month': "Monthly"}
+
+
+def trend_controls(first_day, last_day, key):
+    """Date range and granularity pickers for a trend chart
+
+    Returns (start, end, granularity); "Auto" resolves to the finest grain
+    that keeps the chosen range to a few hundred points.
+    """
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        date_range = st.date_input(
+            "Date range",
+            value=(first_day, last_day),
+            min_value=first_day,
+            max_value=last_day,
+            key=f"{key}_range"
+        )
+    with col2:
+        label = st.selectbox("Granularity", list(GRANULARITY_OPTIONS), key=f"{key}_granularity")
+
+    # While the user is still picking, date_input returns only the start date
+    start, end = (date_range[0], date_range[-1]) if date_range else (first_day, last_day)
+    granularity = GRANULARITY_OPTIONS[label] or choose_granularity(start, end)
+    return start, end, granularity
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _figure_dict(chart_id, version, _build):
+    return _build().to_dict()
+
+
+def cached_chart(chart_id, version, build):
+    """Render a Plotly figure built once per (chart_id, data version) and shared across sessions
+
+    chart_id names the chart and any inputs besides the data (a date range,
+    say); version is the data version of the tables it plots. build() is
+    only called on a miss.
+    """
+    st.plotly_chart(_figure_dict(chart_id, version, build), use_container_width=True)
+
+
+def lazy_tabs(labels, key):
+    """Tab bar whose views are built only when selected; returns the selected label
+
+    Every st.tabs body runs on each rerun, queries and figures included.
+    This horizontal selector lets the page run just the chosen view's
+    branch, so an interaction costs one view's work. The selection is kept
+    in session state under key.
+    """
+    return st.radio("View", labels, horizontal=True, key=key, label_visibility="collapsed")
+
+
+PAGE_SIZES = (25, 50, 100)
+
+
+def paginated_table(key, fetch_page, total, reset_on=()):
+    """Show a table one page at a time with Previous/Next controls
+
+    fetch_page(after, page_size) returns (frame, next_cursor) as the
+    DatabaseManager.page_* methods do. The cursors of the pages visited are
+    kept in session state so Previous is a cursor lookup, and the stack is
+    cleared whenever reset_on (the current filters) changes.
+    """
+    page_size = st.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_page_size")
+
+    state_key = f"{key}_cursors"
+    filters = (tuple(reset_on), page_size)
+    if st.session_state.get(f"{key}_filters") != filters:
+        st.session_state[f"{key}_filters"] = filters
+        st.session_state[state_key] = [None]
+    cursors = st.session_state[state_key]
+
+    page, next_cursor = fetch_page(cursors[-1], page_size)
+    st.dataframe(page, use_container_width=True, hide_index=True)
+
+    page_number = len(cursors)
+    first_row = (page_number - 1) * page_size + 1 if len(page) else 0
+    last_row = (page_number - 1) * page_size + len(page)
+
+    # Callbacks move the cursor before the next run renders the table
+    col1, col2, col3 = st.columns([1, 3, 1])
+    with col1:
+        st.button("◀ Previous", key=f"{key}_prev", disabled=page_number == 1,
+                  on_click=cursors.pop)
+    with col2:
+        st.caption(f"Showing {first_row}–{last_row} of {total}")
+    with col3:
+        st.button("Next ▶", key=f"{key}_next", disabled=next_cursor is None,
+                  on_click=cursors.append, args=(next_cursor,))
+
+
+def show_advice(key):
+    """Render the advisor answer kept in session state under key, streaming it while it arrives
+
+    The request itself runs on the shared scheduler, so an interaction that
+    reruns the page interrupts only this rendering loop; the next run picks
+    the same answer up where it is. While it waits for a rate-limit slot the
+    place in the queue is shown instead.
+    """
+    advice = st.session_state.get(key)
+    if advice is None:
+        return
+    st.success("AI Response (cached):" if advice.cached else "AI Response:")
+    placeholder = st.empty()
+    for text in advice.stream():
+        if text:
+            placeholder.markdown(text + " ▌")
+            continue
+        # Not started yet: say where it stands in the shared queue
+        status = queue_status(advice)
+        if status is not None:
+            ahead, eta = status
+            placeholder.info(f"⏳ Waiting for the AI service: {ahead} request(s) ahead, about {eta:.0f}s")
+        else:
+            placeholder.markdown("▌")
+    placeholder.markdown(advice.text)
+    if advice.error is not None:
+        st.error(f"AI service error: {advice.error}")
+
+
+def record_picker(noun, find, id_col, label_col, key):
+    """Search box and selectbox for picking one record; returns its id, or None until something matches
+
+    find(text) returns matching rows (an id lookup or a full-text search),
+    so only the matches are loaded and sent to the browser, never every
+    row of the table.
+    """
+    text = st.text_input(f"🔍 Find {noun}", placeholder="Words from the name, or an id", key=f"{key}_find")
+    if not text:
+        return None
+    matches = find(text)
+    if matches.empty:
+        st.caption(f"No {noun} matches")
+        return None
+    labels = dict(zip(matches[id_col], matches[label_col]))
+    return st.selectbox(f"Select {noun}", options=list(labels),
+                        format_func=lambda x: f"#{x} · {labels[x]}", key=f"{key}_choice")
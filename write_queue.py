@@ -0,0 +1,178 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+from collections import namedtuple
+from concurrent.futures import Future
+
+from connection_pool import DEFAULT_POOL_TIMEOUT, DEFAULT_STORAGE_MODE, configure_connection
+
+DEFAULT_BATCH_SIZE = int(os.getenv('DB_WRITE_BATCH_SIZE', '200'))
+DEFAULT_BATCH_WINDOW = float(os.getenv('DB_WRITE_BATCH_WINDOW', '0.005'))
+# The row_changes log keeps its newest CHANGE_LOG_KEEP entries; the writer
+# trims it after every CHANGE_LOG_PRUNE_EVERY commits. Incremental frames
+# whose watermark falls out of the kept window reload in full.
+CHANGE_LOG_KEEP = int(os.getenv('DB_CHANGE_LOG_KEEP', '100000'))
+CHANGE_LOG_PRUNE_EVERY = int(os.getenv('DB_CHANGE_LOG_PRUNE_EVERY', '500'))
+
+PRUNE_ROW_CHANGES = """DELETE FROM row_changes
+                       WHERE change_id <= (SELECT MAX(change_id) FROM row_changes) - ?"""
+
+WriteResult = namedtuple('WriteResult', ['lastrowid', 'rowcount'])
+
+_STOP = object()
+
+
+class WriteQueue:
+    """Single writer thread that serializes and batches every database write
+
+    Callers submit statements and get a Future back. The writer drains
+    whatever has queued up (up to batch_size jobs), runs them in one
+    transaction with a savepoint per job and commits once, so a burst of
+    form submissions costs a single fsync and never contends for the lock.
+    A failing statement only fails its own Future. Every prune_every
+    commits the writer also trims the row_changes log to change_log_keep
+    entries, so the log stays bounded however many updates are made.
+    """
+
+    def __init__(self, db_path, storage_mode=DEFAULT_STORAGE_MODE,
+                 batch_size=DEFAULT_BATCH_SIZE, batch_window=DEFAULT_BATCH_WINDOW,
+                 timeout=DEFAULT_POOL_TIMEOUT, change_log_keep=CHANGE_LOG_KEEP,
+                 prune_every=CHANGE_LOG_PRUNE_EVERY):
+        self.db_path = db_path
+        self.storage_mode = storage_mode
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self.change_log_keep = change_log_keep
+        self.prune_every = prune_every
+        self._commits = 0
+        self._jobs = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name=f"db-writer:{db_path}", daemon=True)
+        self._thread.start()
+
+    def submit(self, query, params=(), many=False):
+        """Queue a statement; the Future resolves to a WriteResult"""
+        future = Future()
+        self._jobs.put((query, params, many, future))
+        return future
+
+    def execute(self, query, params=(), many=False):
+        """Queue a statement and wait for it to be committed"""
+        return self.submit(query, params, many).result(timeout=self.timeout)
+
+    def close(self):
+        """Flush pending writes and stop the writer thread"""
+        if self._thread.is_alive():
+            self._jobs.put(_STOP)
+            self._thread.join()
+
+    def _next_batch(self):
+        """Block for one job, then gather whatever else arrives in the batch window"""
+        batch = [self._jobs.get()]
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            try:
+                batch.append(self._jobs.get(timeout=self.batch_window))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout,
+                               check_same_thread=False, isolation_level=None)
+        configure_connection(conn, self.storage_mode, self.timeout)
+        try:
+            while True:
+                batch = self._next_batch()
+                stop = batch[-1] is _STOP
+                jobs = [job for job in batch if job is not _STOP]
+                # executemany jobs are already batches: each is committed in a
+                # transaction of its own, without a savepoint, since a savepoint
+                # around a large executemany makes every page it modifies go
+                # through the statement journal
+                singles = [job for job in jobs if not job[2]]
+                if singles:
+                    self._commit_batch(conn, singles)
+                for job in jobs:
+                    if job[2]:
+                        self._commit_batch(conn, [job])
+                if self._commits >= self.prune_every:
+                    self._prune(conn)
+                if stop:
+                    break
+        finally:
+            conn.close()
+
+    def _commit_batch(self, conn, jobs):
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            isolate = len(jobs) > 1
+            for query, params, many, future in jobs:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if isolate:
+                    conn.execute("SAVEPOINT job")
+                try:
+                    if many:
+                        cursor = conn.executemany(query, params)
+                    else:
+                        cursor = conn.execute(query, params)
+                    if isolate:
+                        conn.execute("RELEASE job")
+                    results.append((future, WriteResult(cursor.lastrowid, cursor.rowcount)))
+                except Exception as e:
+                    if not isolate:
+                        raise
+                    conn.execute("ROLLBACK TO job")
+                    conn.execute("RELEASE job")
+                    future.set_exception(e)
+            conn.execute("COMMIT")
+            self._commits += 1
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for query, params, many, future in jobs:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for future, result in results:
+            future.set_result(result)
+
+    def _prune(self, conn):
+        """Trim the change log to its newest entries, in a transaction of its own"""
+        self._commits = 0
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(PRUNE_ROW_CHANGES, (self.change_log_keep,))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            # e.g. a database created before the change log existed
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(db_path, storage_mode=None):
+    """Return the process-wide writer for a database file, starting it once"""
+    key = os.path.abspath(db_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = WriteQueue(db_path, storage_mode or DEFAULT_STORAGE_MODE)
+            _writers[key] = writer
+        return writer
+
+
+@atexit.register
+def _close_writers():
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()